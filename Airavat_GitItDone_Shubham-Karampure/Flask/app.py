@@ -1,9 +1,11 @@
 # app.py (Combined Server)
 import os
 import json
+import multiprocessing
 import traceback
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
 
 # Import functionalities from your separate logic files
 from text_generation import WikiComicGenerator # Now includes narration generation
@@ -11,6 +13,11 @@ from image_generation import generate_image
 from langchain_rag.context import query_with_context
 from langchain_rag.highlight import explain_highlight
 from video.video_gen import generate_video
+from video.jobs import JobQueue, JobStore
+from video.profiles import OUTPUT_FORMATS, RENDER_PROFILES, get_format_output_path
+from video.streaming import PLAYLIST_NAME, get_hls_dir, get_hls_settings
+from video.uploads import content_etag, enforce_upload_limit, touch_upload
+from video.metrics import RenderTrace, render_metrics
 from langchain_rag.quiz import QuizGenerator
 import cloudinary
 import cloudinary.uploader
@@ -19,6 +26,7 @@ from dotenv import load_dotenv
 import time
 import requests
 import tempfile
+import uuid
 load_dotenv()  
 
 # Config with your account details
@@ -160,64 +168,259 @@ def explain_highlight_api():
         print(f"API Error in /explain_highlight: {e}\n{traceback.format_exc()}")
         return jsonify({"error": "Internal server error.", "details": str(e)}), 500
 
+# --- Video Generation ---
+
+VIDEO_OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "uploads")
+
+def parse_video_request(data):
+    """Validate a video request body; returns (params, error_message)"""
+    if not data: return None, "Invalid JSON."
+
+    texts = data.get('texts')
+    image_urls = data.get('image_urls')
+    subtitle_style = data.get('subtitle_style', 'captions_ai') # Default to new style
+    output_filename = data.get('output_filename')
+    render_profile = data.get('render_profile') # draft / standard / final, server default if omitted
+    output_formats = data.get('output_formats') # e.g. ["16:9", "9:16", "1:1"], one video per aspect ratio
+    stream = data.get('stream', False) # true or {"segment_duration", "keyframe_interval", "segment_type"}: HLS while rendering
+
+    if not texts or not isinstance(texts, list): return None, "'texts' must be a list."
+    if not image_urls or not isinstance(image_urls, list): return None, "'image_urls' must be a list."
+    if len(texts) != len(image_urls): return None, "Number of texts must match image URLs."
+    if output_filename is not None and (not isinstance(output_filename, str) or os.path.basename(output_filename) != output_filename):
+        return None, "'output_filename' must be a plain file name."
+    if render_profile is not None and render_profile not in RENDER_PROFILES:
+        return None, f"'render_profile' must be one of: {', '.join(RENDER_PROFILES)}."
+    if output_formats is not None and (not isinstance(output_formats, list) or not output_formats
+                                       or any(f not in OUTPUT_FORMATS for f in output_formats)):
+        return None, f"'output_formats' must be a non-empty list of: {', '.join(OUTPUT_FORMATS)}."
+    if not isinstance(stream, (bool, dict)): return None, "'stream' must be a boolean or an object."
+    try:
+        get_hls_settings(stream)
+    except ValueError as e:
+        return None, f"'stream': {e}"
+
+    return {
+        "texts": texts,
+        "image_urls": image_urls,
+        "subtitle_style": subtitle_style,
+        "output_filename": output_filename,
+        "render_profile": render_profile,
+        "output_formats": output_formats,
+        "stream": stream
+    }, None
+
+def get_stream_urls(params):
+    """URLs of the HLS playlists of a streamed render ({format: url} with output_formats), or None"""
+    if not params.get("stream"):
+        return None
+    def stream_url(filename):
+        return f"/hls/{os.path.basename(get_hls_dir(filename))}/{PLAYLIST_NAME}"
+    if params.get("output_formats"):
+        return {f: stream_url(get_format_output_path(params["output_filename"], f)) for f in params["output_formats"]}
+    return stream_url(params["output_filename"])
+
+def upload_video_to_cloudinary(output_path, output_filename, public_id=None):
+    """Upload a rendered video and return the response fields for it"""
+    # Set resource_type to 'video' for video uploads
+    upload_result = cloudinary.uploader.upload(
+        output_path,
+        resource_type="video",
+        folder="comic_videos",  # Optional: store in a specific folder
+        public_id=public_id or f"comic_video_{int(time.time())}",  # Unique identifier
+        overwrite=True,
+        tags=['comic_video', 'airavat']  # Optional: add tags for organization
+    )
+    
+    # Get the secure URL from the upload result
+    video_url = upload_result.get('secure_url')
+    
+    if not video_url:
+        raise Exception("Failed to get secure URL from Cloudinary upload")
+        
+    print(f"Video uploaded to Cloudinary: {video_url}")
+    
+    return {
+        "success": True,
+        "video_url": video_url,
+        "cloudinary_public_id": upload_result.get('public_id'),
+        "duration": upload_result.get('duration'),
+        "filename": output_filename,
+        "format": upload_result.get('format', 'mp4'),
+        "resource_type": upload_result.get('resource_type', 'video')
+    }
+
+def publish_video(output_path, output_filename, public_id=None):
+    """Upload a rendered video, falling back to serving it from this server"""
+    try:
+        return upload_video_to_cloudinary(output_path, output_filename, public_id=public_id)
+    except Exception as cloud_error:
+        print(f"Cloudinary upload error: {cloud_error}")
+        return {
+            "success": True,
+            "video_url": f"/video/{output_filename}",
+            "filename": output_filename,
+            "format": "mp4",
+            "resource_type": "video",
+            "cloudinary_error": str(cloud_error)
+        }
+
+def publish_video_formats(output_paths):
+    """
+    publish_video for every {format: path} of a multi-format render.
+
+    The first format's fields are returned at the top level, as for a
+    single video, and every format's under "formats".
+    """
+    timestamp = int(time.time())
+    formats = {
+        output_format: publish_video(path, os.path.basename(path),
+                                     public_id=f"comic_video_{timestamp}_{output_format.replace(':', 'x')}")
+        for output_format, path in output_paths.items()
+    }
+    result = dict(next(iter(formats.values())))
+    result["formats"] = formats
+    return result
+
+def run_video_job(params, progress):
+    """Render and upload one queued video job; runs on a JobQueue worker thread"""
+    os.makedirs(VIDEO_OUTPUT_DIR, exist_ok=True)
+    output_filename = params["output_filename"]
+    output_path = os.path.join(VIDEO_OUTPUT_DIR, output_filename)
+
+    # Stage timings and counters for the render and the upload; the summary goes into the result
+    trace = RenderTrace()
+    try:
+        print(f"Generating video with {len(params['texts'])} segments (Style: {params['subtitle_style']})...")
+        output_paths = generate_video(params["texts"], params["image_urls"], output_path=output_path,
+                                      subtitle_style=params["subtitle_style"], profile=params.get("render_profile"), progress=progress,
+                                      trace=trace, output_formats=params.get("output_formats"), hls=params.get("stream", False))
+        enforce_upload_limit(VIDEO_OUTPUT_DIR, keep=list(output_paths.values()) if output_paths else [output_path])
+
+        progress("uploading")
+        with trace.stage("upload"):
+            if params.get("output_formats"):
+                result = publish_video_formats(output_paths)
+            else:
+                result = publish_video(output_path, output_filename)
+        if params.get("stream"):
+            result["stream_url"] = get_stream_urls(params)
+    except Exception as e:
+        trace.finish(error=e)
+        raise
+    result["metrics"] = trace.finish()
+    return result
+
+video_jobs = JobQueue(JobStore(), run_video_job)
+# Queued jobs (including ones left over from a restart) start running right
+# away; the debug reloader's parent process only watches files, so it doesn't,
+# and neither do render workers, which re-import this module when spawned
+if multiprocessing.parent_process() is None and (
+        os.environ.get("FLASK_DEBUG", "false").lower() != "true" or os.environ.get("WERKZEUG_RUN_MAIN") == "true"):
+    video_jobs.start()
+
+@app.route('/video_jobs', methods=['POST'])
+def create_video_job_api():
+    try:
+        params, error = parse_video_request(request.get_json(silent=True))
+        if error: return jsonify({"error": error}), 400
+
+        job_id = uuid.uuid4().hex
+        # Jobs render concurrently, so each gets its own output file by default
+        params["output_filename"] = params["output_filename"] or f"video_{job_id}.mp4"
+        video_jobs.submit(params, job_id=job_id)
+
+        print(f"Queued video job {job_id} with {len(params['texts'])} segments")
+        response = {
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/video_jobs/{job_id}",
+            "result_url": f"/video_jobs/{job_id}/result"
+        }
+        if params["stream"]:
+            # The playlist is served (404 until then) once the first chapter is encoded
+            response["stream_url"] = get_stream_urls(params)
+        return jsonify(response), 202
+    except Exception as e:
+        print(f"API Error in /video_jobs: {e}\n{traceback.format_exc()}")
+        return jsonify({"error": "Failed to queue video job.", "details": str(e)}), 500
+
+@app.route('/video_jobs/<job_id>', methods=['GET'])
+def get_video_job_api(job_id):
+    job = video_jobs.store.get(job_id)
+    if job is None: return jsonify({"error": "Job not found"}), 404
+    status = {
+        "job_id": job_id,
+        "status": job["status"],
+        "stage": job["stage"],
+        "progress": job["progress"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"]
+    }
+    if job["params"].get("stream"):
+        status["stream_url"] = get_stream_urls(job["params"])
+    return jsonify(status), 200
+
+@app.route('/video_jobs/<job_id>/result', methods=['GET'])
+def get_video_job_result_api(job_id):
+    job = video_jobs.store.get(job_id)
+    if job is None: return jsonify({"error": "Job not found"}), 404
+    if job["status"] == "failed":
+        return jsonify({"error": "An error occurred while generating the video.", "details": job["error"]}), 500
+    if job["status"] != "done":
+        # Not ready yet: point the client back at the status endpoint
+        return jsonify({"status": job["status"], "stage": job["stage"], "progress": job["progress"],
+                        "status_url": f"/video_jobs/{job_id}"}), 202
+    return jsonify(job["result"]), 200
+
 @app.route('/generate_video', methods=['POST'])
 def generate_video_api():
     try:
-        data = request.get_json()
-        if not data: return jsonify({"error": "Invalid JSON."}), 400
-
-        texts = data.get('texts')
-        image_urls = data.get('image_urls')
-        subtitle_style = data.get('subtitle_style', 'captions_ai') # Default to new style
-        output_filename = data.get('output_filename', 'output.mp4')
-
-        if not texts or not isinstance(texts, list): return jsonify({"error": "'texts' must be a list."}), 400
-        if not image_urls or not isinstance(image_urls, list): return jsonify({"error": "'image_urls' must be a list."}), 400
-        if len(texts) != len(image_urls): return jsonify({"error": "Number of texts must match image URLs."}), 400
+        params, error = parse_video_request(request.get_json(silent=True))
+        if error: return jsonify({"error": error}), 400
+        output_filename = params["output_filename"] or 'output.mp4'
 
         # Create output directory if it doesn't exist
-        output_dir = os.path.join(os.path.dirname(__file__), "uploads")
+        output_dir = VIDEO_OUTPUT_DIR
         if not os.path.exists(output_dir): os.makedirs(output_dir)
         output_path = os.path.join(output_dir, output_filename)
 
-        print(f"Generating video with {len(texts)} segments (Style: {subtitle_style})...")
+        print(f"Generating video with {len(params['texts'])} segments (Style: {params['subtitle_style']})...")
         # Generate the video
-        generate_video(texts, image_urls, output_path=output_path, subtitle_style=subtitle_style)
+        trace = RenderTrace()
+        try:
+            output_paths = generate_video(params["texts"], params["image_urls"], output_path=output_path,
+                                          subtitle_style=params["subtitle_style"], profile=params["render_profile"], trace=trace,
+                                          output_formats=params["output_formats"], hls=params["stream"])
+        except Exception as e:
+            trace.finish(error=e)
+            raise
+        enforce_upload_limit(VIDEO_OUTPUT_DIR, keep=list(output_paths.values()) if output_paths else [output_path])
+
+        if params["output_formats"]:
+            # Several files can't be sent as one response; each falls back to /video/<filename>
+            with trace.stage("upload"):
+                result = publish_video_formats(output_paths)
+            if params["stream"]:
+                result["stream_url"] = get_stream_urls(dict(params, output_filename=output_filename))
+            result["metrics"] = trace.finish()
+            return jsonify(result), 200
 
         print(f"Video generated at {output_path}, uploading to Cloudinary...")
         
         # Upload the video to Cloudinary
         try:
-            # Set resource_type to 'video' for video uploads
-            upload_result = cloudinary.uploader.upload(
-                output_path,
-                resource_type="video",
-                folder="comic_videos",  # Optional: store in a specific folder
-                public_id=f"comic_video_{int(time.time())}",  # Unique identifier
-                overwrite=True,
-                tags=['comic_video', 'airavat']  # Optional: add tags for organization
-            )
-            
-            # Get the secure URL from the upload result
-            video_url = upload_result.get('secure_url')
-            
-            if not video_url:
-                raise Exception("Failed to get secure URL from Cloudinary upload")
-                
-            print(f"Video uploaded to Cloudinary: {video_url}")
-            
             # Return the Cloudinary URL and other relevant info
-            return jsonify({
-                "success": True,
-                "video_url": video_url,
-                "cloudinary_public_id": upload_result.get('public_id'),
-                "duration": upload_result.get('duration'),
-                "filename": output_filename,
-                "format": upload_result.get('format', 'mp4'),
-                "resource_type": upload_result.get('resource_type', 'video')
-            }), 200
+            with trace.stage("upload"):
+                result = upload_video_to_cloudinary(output_path, output_filename)
+            if params["stream"]:
+                result["stream_url"] = get_stream_urls(dict(params, output_filename=output_filename))
+            result["metrics"] = trace.finish()
+            return jsonify(result), 200
             
         except Exception as cloud_error:
+            trace.finish()
             print(f"Cloudinary upload error: {cloud_error}")
             print(traceback.format_exc())
             
@@ -272,17 +475,90 @@ def generate_quiz_api():
         print(traceback.format_exc())
         return jsonify({"error": "An internal server error occurred.", "details": str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics_api():
+    """Render stage timings and counters of this process, in Prometheus text format"""
+    return Response(render_metrics.prometheus_text(), mimetype="text/plain; version=0.0.4")
+
+# Block size for servers without sendfile that read the file through wsgi.file_wrapper
+SENDFILE_BLOCK_SIZE = 1 << 20
+
+def send_video(video_path):
+    """
+    send_file with a strong content ETag, Range/206 and zero-copy ranges.
+
+    Werkzeug answers If-None-Match / If-Range and Range requests (304, 206,
+    416) from the ETag. Whole files already go through the server's
+    wsgi.file_wrapper, which gunicorn sends with os.sendfile; under gunicorn
+    a byte range is handed to it too, as the file positioned at the range
+    start with Content-Length as the byte count, instead of being read in Python.
+    """
+    stat = os.stat(video_path)
+    response = send_file(video_path, mimetype='video/mp4', conditional=True,
+                         etag=content_etag(video_path, stat), last_modified=stat.st_mtime)
+    touch_upload(video_path, stat)
+    file_wrapper = request.environ.get("wsgi.file_wrapper")
+    if (response.status_code == 206 and file_wrapper is not None
+            and request.environ.get("SERVER_SOFTWARE", "").startswith("gunicorn")):
+        response.response.close()
+        f = open(video_path, "rb")
+        f.seek(response.content_range.start)
+        response.response = file_wrapper(f, SENDFILE_BLOCK_SIZE)
+    return response
+
+def resolve_upload_file(*parts):
+    """
+    Path of an existing file inside VIDEO_OUTPUT_DIR from URL path parts, or None.
+
+    Each part must be a plain name ("..", "." and separators are refused) and
+    the resolved path must still lie under the upload root, so neither
+    traversal nor symlinks reach outside it, and directories are never served.
+    """
+    if any(not part or part in (".", "..") or os.path.basename(part) != part for part in parts):
+        return None
+    root = os.path.realpath(VIDEO_OUTPUT_DIR)
+    path = os.path.realpath(os.path.join(root, *parts))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        return None
+    return path
+
 # Also add a route to serve existing videos by filename
 @app.route('/video/<filename>', methods=['GET'])
 def get_video(filename):
     try:
-        video_path = os.path.join(os.path.dirname(__file__), "uploads", filename)
-        if not os.path.exists(video_path): return jsonify({"error": "Video not found"}), 404
-        return send_file(video_path, mimetype='video/mp4')
+        video_path = resolve_upload_file(filename)
+        if video_path is None:
+            return jsonify({"error": "Video not found"}), 404
+        return send_video(video_path)
+    except HTTPException:
+        # 416 for a range past the end of the file
+        raise
     except Exception as e:
         print(f"Error serving video {filename}: {e}")
         return jsonify({"error": "Failed to serve video"}), 500
 
+HLS_MIMETYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".m4s": "video/iso.segment",
+    ".mp4": "video/mp4",
+    ".ts": "video/mp2t",
+}
+
+# HLS playlists and segments of streamed renders (see video.streaming), live while they render
+@app.route('/hls/<stream_dir>/<filename>', methods=['GET'])
+def get_hls_file(stream_dir, filename):
+    extension = os.path.splitext(filename)[1]
+    if not stream_dir.endswith("_hls") or extension not in HLS_MIMETYPES:
+        return jsonify({"error": "Stream file not found"}), 404
+    path = resolve_upload_file(stream_dir, filename)
+    if path is None:
+        return jsonify({"error": "Stream file not found"}), 404
+    response = send_file(path, mimetype=HLS_MIMETYPES[extension])
+    if extension == ".m3u8":
+        # The playlist grows while the render runs; segments never change once written
+        response.headers["Cache-Control"] = "no-cache"
+    return response
+
 @app.route('/get_details', methods=['POST'])
 def get_details_api():
     try:
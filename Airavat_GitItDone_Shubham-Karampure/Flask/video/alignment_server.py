@@ -0,0 +1,238 @@
+"""
+Shared Whisper alignment service.
+
+One process owns the Whisper model and serves word-timestamp jobs for every
+Flask/gunicorn worker on the host, so adding web workers does not add model
+copies and no request pays a cold model load. Start it before the web workers:
+
+    cd Flask
+    ALIGNMENT_SERVER_ADDRESS=default python -m video.alignment_server
+
+Workers send jobs to it whenever ALIGNMENT_SERVER_ADDRESS is set (see
+video_gen.align_narration) and align locally if it cannot be reached.
+Jobs that arrive together are aligned together in one batch.
+
+Connections are authenticated with ALIGNMENT_SERVER_AUTHKEY or, when that is
+unset, a random key the server writes to a 0600 file in a private (0700)
+runtime directory on first start; the default socket lives there as well
+and is itself made 0600. Clients of the same user read the key from that
+file. multiprocessing.connection unpickles what it receives, so the key must
+never be guessable.
+"""
+import argparse
+import os
+import platform
+import queue
+import secrets
+import tempfile
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+# How long the batcher waits for more jobs after the first one arrives
+BATCH_WINDOW_SECONDS = 0.05
+
+
+def get_runtime_dir():
+    """Private directory of this user for the socket and key file, created 0700 if missing"""
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    uid = os.getuid() if hasattr(os, "getuid") else os.getlogin()
+    directory = os.path.join(base, f"airavat-alignment-{uid}")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if hasattr(os, "getuid"):
+        stat = os.stat(directory)
+        if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+            raise Exception(f"{directory} must be owned by this user and not accessible to others")
+    return directory
+
+
+def default_address():
+    if platform.system() == "Windows":
+        return r"\\.\pipe\airavat-alignment"
+    return os.path.join(get_runtime_dir(), "alignment.sock")
+
+
+def get_server_address():
+    """Configured server address ("default" for default_address()), or None when the service is not in use"""
+    address = os.environ.get("ALIGNMENT_SERVER_ADDRESS") or None
+    return default_address() if address == "default" else address
+
+
+def get_authkey_file():
+    return os.environ.get("ALIGNMENT_SERVER_AUTHKEY_FILE") or os.path.join(get_runtime_dir(), "authkey")
+
+
+def get_authkey(create=False):
+    """
+    The connection authkey: ALIGNMENT_SERVER_AUTHKEY, else the key file.
+
+    With create (the server) a missing key file is filled with a random key,
+    readable by this user only; clients raise when there is no key.
+    """
+    authkey = os.environ.get("ALIGNMENT_SERVER_AUTHKEY")
+    if authkey:
+        return authkey.encode("utf-8")
+
+    path = get_authkey_file()
+    if create and not os.path.exists(path):
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass  # Another server just created it
+        else:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(secrets.token_hex(32))
+    try:
+        with open(path, encoding="utf-8") as f:
+            if hasattr(os, "getuid") and os.fstat(f.fileno()).st_mode & 0o077:
+                raise Exception(f"Alignment server key file {path} must not be accessible to other users")
+            authkey = f.read().strip()
+    except OSError:
+        raise Exception(f"Set ALIGNMENT_SERVER_AUTHKEY or start the alignment server to create {path}")
+    if not authkey:
+        raise Exception(f"Alignment server key file {path} is empty")
+    return authkey.encode("utf-8")
+
+
+def request_alignment(audio_files, texts, aligner=None, address=None, timeout=600):
+    """
+    Ask the alignment server for word timestamps of each clip.
+
+    Returns one list of words per audio file, like get_word_timestamps_batched.
+    """
+    address = address or get_server_address() or default_address()
+    connection = Client(address, authkey=get_authkey())
+    try:
+        connection.send({
+            "op": "align",
+            # The server resolves paths itself, so they must not depend on our CWD
+            "audio_files": [os.path.abspath(audio_file) for audio_file in audio_files],
+            "texts": list(texts),
+            "aligner": aligner
+        })
+        if not connection.poll(timeout):
+            raise TimeoutError(f"Alignment server did not answer within {timeout}s")
+        response = connection.recv()
+    finally:
+        connection.close()
+
+    if "error" in response:
+        raise Exception(f"Alignment server error: {response['error']}")
+    return response["words"]
+
+
+def ping(address=None):
+    """True if an alignment server is accepting connections"""
+    try:
+        connection = Client(address or get_server_address() or default_address(), authkey=get_authkey())
+    except Exception:
+        return False
+    try:
+        connection.send({"op": "ping"})
+        return connection.recv().get("ok", False)
+    finally:
+        connection.close()
+
+
+class AlignmentServer:
+    """Accepts jobs on a Listener and aligns them in batches on one thread"""
+
+    def __init__(self, address, model_size="base"):
+        self.address = address
+        self.model_size = model_size
+        self.jobs = queue.Queue()
+        self.jobs_done = 0
+        self.batches_done = 0
+
+    def serve_forever(self):
+        # Import here so clients never pull in the model stack
+        from video import video_gen
+        self.video_gen = video_gen
+
+        # Preload so the first job doesn't pay for the model load
+        print(f"Loading Whisper model '{self.model_size}'...")
+        video_gen.get_whisper_model(self.model_size)
+
+        if isinstance(self.address, str) and not self.address.startswith("\\\\") and os.path.exists(self.address):
+            if ping(self.address):
+                raise Exception(f"An alignment server is already listening on {self.address}")
+            os.remove(self.address)  # Stale socket from a previous run
+
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+
+        with Listener(self.address, authkey=get_authkey(create=True)) as listener:
+            if isinstance(self.address, str) and not self.address.startswith("\\\\"):
+                # Only this user may connect to the Unix socket
+                os.chmod(self.address, 0o600)
+            print(f"Alignment server listening on {self.address}")
+            while True:
+                try:
+                    connection = listener.accept()
+                except Exception as e:
+                    print(f"Alignment server rejected a connection: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+
+    def _handle(self, connection):
+        try:
+            request = connection.recv()
+            if request.get("op") == "ping":
+                connection.send({"ok": True, "jobs_done": self.jobs_done, "batches_done": self.batches_done})
+                return
+
+            job = {"request": request, "done": threading.Event(), "response": None}
+            self.jobs.put(job)
+            job["done"].wait()
+            connection.send(job["response"])
+        except Exception as e:
+            print(f"Alignment server connection error: {e}")
+        finally:
+            connection.close()
+
+    def _batch_loop(self):
+        while True:
+            batch = [self.jobs.get()]
+            # Gather everything that arrives while we wait a moment
+            deadline = time.monotonic() + BATCH_WINDOW_SECONDS
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.jobs.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        by_aligner = {}
+        for job in batch:
+            by_aligner.setdefault(job["request"].get("aligner"), []).append(job)
+
+        for aligner, jobs in by_aligner.items():
+            audio_files = [audio_file for job in jobs for audio_file in job["request"]["audio_files"]]
+            texts = [text for job in jobs for text in job["request"]["texts"]]
+            try:
+                words = self.video_gen.get_word_timestamps_batched(audio_files, texts, self.model_size, aligner)
+                offset = 0
+                for job in jobs:
+                    count = len(job["request"]["audio_files"])
+                    job["response"] = {"words": words[offset:offset + count]}
+                    offset += count
+            except Exception as e:
+                for job in jobs:
+                    job["response"] = {"error": str(e)}
+
+            for job in jobs:
+                self.jobs_done += 1
+                job["done"].set()
+        self.batches_done += 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared Whisper alignment server")
+    parser.add_argument("--address", default=get_server_address() or default_address())
+    parser.add_argument("--model-size", default=os.environ.get("WHISPER_MODEL_SIZE", "base"))
+    args = parser.parse_args()
+    AlignmentServer(args.address, args.model_size).serve_forever()
@@ -0,0 +1,122 @@
+import math
+import os
+
+from video.captions import (
+    DEFAULT_COLOR_SCHEME, GLOW_ALPHA, SHADOW_ALPHA, CaptionCompositor
+)
+from video.timeline import WordTimeline
+
+
+def ass_color(rgb, alpha=255):
+    """ASS &HAABBGGRR colour; ASS alpha is inverted (00 = opaque)"""
+    r, g, b = rgb
+    return f"&H{255 - alpha:02X}{b:02X}{g:02X}{r:02X}"
+
+
+def ass_override_color(rgb):
+    """&HBBGGRR& colour for inline \\1c / \\3c override tags"""
+    r, g, b = rgb
+    return f"&H{b:02X}{g:02X}{r:02X}&"
+
+
+def format_ass_time(seconds):
+    """
+    Format seconds as an ASS H:MM:SS.cc timestamp.
+
+    Rounded down to the centisecond: frame times (n / fps) then fall on the
+    same side of every boundary as they do in the Python renderer.
+    """
+    centiseconds = int(math.floor(seconds * 100 + 1e-6))
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    secs, centiseconds = divmod(centiseconds, 100)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+
+def escape_ass_text(text):
+    """Keep words from being read as override blocks or escapes"""
+    return text.replace("\\", "⧵").replace("{", "(").replace("}", ")")
+
+
+def get_ass_font(font):
+    """(family name, bold flag, fonts directory, ASS font size) for a PIL truetype font"""
+    family, style = font.getname()
+    ascent, descent = font.getmetrics()
+    # libass sizes a font by its ascent + descent, PIL by its em size
+    return family, "bold" in (style or "").lower(), os.path.dirname(getattr(font, "path", "")) or None, ascent + descent
+
+
+def build_caption_ass(words_with_timestamps, frame_width, frame_height, font, color_scheme=None,
+                      fps=24, segment_start_times=None, scale=1.0):
+    """
+    Build an ASS script that reproduces the captions.ai style captions.
+
+    Caption states come from WordTimeline.caption_events, so captions appear,
+    change and disappear on exactly the frames the Python renderer uses. Every
+    word is placed with \\pos at the position CaptionCompositor.layout gives
+    it (same 8-word window, wrapping, line spacing and bottom padding); the
+    current word gets the highlight colour over a translucent box (an opaque
+    box border style on its own layer; libass boxes have square corners), and
+    every word carries the same 1px shadow. scale sizes the pixel constants
+    like CaptionCompositor's scale.
+    """
+    color_scheme = color_scheme or DEFAULT_COLOR_SCHEME
+    family, bold, _, font_size = get_ass_font(font)
+    compositor = CaptionCompositor(frame_width, frame_height, font=font, color_scheme=color_scheme, scale=scale)
+    timeline = WordTimeline(words_with_timestamps)
+
+    highlight = f"\\1c{ass_override_color(color_scheme['highlight'])}"
+
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {frame_width}",
+        f"PlayResY: {frame_height}",
+        "WrapStyle: 2",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, "
+        "Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, "
+        "MarginL, MarginR, MarginV, Encoding",
+        f"Style: Caption,{family},{font_size},{ass_color(color_scheme['text'])},{ass_color(color_scheme['highlight'])},"
+        f"{ass_color(color_scheme['highlight'], GLOW_ALPHA)},{ass_color(color_scheme['shadow'], SHADOW_ALPHA)},"
+        f"{-1 if bold else 0},0,0,0,100,100,0,0,1,0,{compositor.shadow_offset},7,0,0,0,1",
+        # Box behind the current word: invisible text, glow padding wide border box
+        f"Style: Glow,{family},{font_size},&HFF000000,&HFF000000,{ass_color(color_scheme['highlight'], GLOW_ALPHA)},"
+        f"&HFF000000,{-1 if bold else 0},0,0,0,100,100,0,0,3,{compositor.glow_padding},0,7,0,0,0,1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+
+    last_end = float(timeline.ends.max()) if len(timeline) else 0.0
+    for start_frame, end_frame, current_word_idx, _ in timeline.caption_events(fps, segment_start_times):
+        if current_word_idx is None:
+            continue
+        start = format_ass_time(start_frame / fps)
+        end = format_ass_time(end_frame / fps if end_frame != math.inf else last_end)
+
+        window_start, window_end = timeline.window(current_word_idx)
+        placed = compositor.layout(words_with_timestamps[window_start:window_end])
+        for i, (word, x, y) in enumerate(placed):
+            text = escape_ass_text(word)
+            if i == current_word_idx - window_start:
+                # Glow box underneath, highlighted word on top
+                lines.append(f"Dialogue: 0,{start},{end},Glow,,0,0,0,,{{\\pos({x:.1f},{y:.1f})\\blur1}}{text}")
+                lines.append(f"Dialogue: 1,{start},{end},Caption,,0,0,0,,{{\\pos({x:.1f},{y:.1f}){highlight}}}{text}")
+            else:
+                lines.append(f"Dialogue: 1,{start},{end},Caption,,0,0,0,,{{\\pos({x:.1f},{y:.1f})}}{text}")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_caption_ass(output_path, words_with_timestamps, frame_width, frame_height, font, color_scheme=None,
+                      fps=24, segment_start_times=None, scale=1.0):
+    """Write build_caption_ass output to output_path and return the path"""
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(build_caption_ass(
+            words_with_timestamps, frame_width, frame_height, font,
+            color_scheme=color_scheme, fps=fps, segment_start_times=segment_start_times, scale=scale
+        ))
+    return output_path
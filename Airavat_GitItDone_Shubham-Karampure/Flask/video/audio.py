@@ -0,0 +1,275 @@
+import os
+import shutil
+import struct
+import subprocess
+
+# Loudness normalization applied to the narration track (EBU R128 target,
+# single-pass loudnorm); set VIDEO_LOUDNORM to "off" to keep the TTS levels
+LOUDNORM_FILTER = os.environ.get("VIDEO_LOUDNORM", "loudnorm=I=-16:TP=-1.5:LRA=11")
+
+# MPEG audio frame header tables, indexed by the header's version bits
+# (0: MPEG 2.5, 2: MPEG 2, 3: MPEG 1) and layer bits (1: III, 2: II, 3: I)
+MPEG_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+MPEG1_BITRATES = {
+    3: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+}
+MPEG2_BITRATES = {
+    3: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    1: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# Bytes read from the start of a file to find the first frame and its VBR header
+HEADER_READ_SIZE = 64 * 1024
+
+
+def get_audio_duration(audio_file):
+    """
+    Duration of an audio file in seconds, read from its headers.
+
+    MP3 durations come from the Xing/Info or VBRI frame count (or the bitrate
+    for a plain CBR stream) and WAV durations from the RIFF header, so no audio
+    is decoded. Other formats are asked of ffprobe. Returns None when the
+    duration cannot be determined this way.
+    """
+    try:
+        with open(audio_file, "rb") as f:
+            head = f.read(HEADER_READ_SIZE)
+            file_size = os.fstat(f.fileno()).st_size
+    except OSError:
+        return None
+
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        duration = get_wav_duration(head, file_size)
+    else:
+        duration = get_mp3_duration(head, file_size)
+    if duration is None:
+        duration = probe_duration(audio_file)
+    return duration
+
+
+def get_wav_duration(head, file_size):
+    """Duration of a PCM WAV file from its fmt and data chunk headers"""
+    offset = 12
+    byte_rate = None
+    while offset + 8 <= len(head):
+        chunk_id, chunk_size = struct.unpack_from("<4sI", head, offset)
+        if chunk_id == b"fmt " and offset + 16 <= len(head):
+            byte_rate = struct.unpack_from("<I", head, offset + 16)[0]
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # Streamed WAVs leave the data size unset
+            data_size = min(chunk_size, file_size - offset - 8)
+            return data_size / byte_rate
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+def get_mp3_duration(head, file_size):
+    """Duration of an MP3 stream from its first frame header, or None if it is not one"""
+    offset = 0
+    if head[:3] == b"ID3" and len(head) >= 10:
+        # Syncsafe tag size, plus the footer if there is one
+        tag_size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+        offset = 10 + tag_size + (10 if head[5] & 0x10 else 0)
+        if offset + 4 > len(head):
+            return None
+
+    frame = find_mp3_frame(head, offset)
+    if frame is None:
+        return None
+    offset, version, layer, bitrate, sample_rate, mono = frame
+    samples_per_frame = 384 if layer == 3 else 1152 if layer == 2 or version == 3 else 576
+
+    # The Xing/Info header sits after the side information of the first frame
+    if version == 3:
+        side_info = 17 if mono else 32
+    else:
+        side_info = 9 if mono else 17
+    xing = offset + 4 + side_info
+    if head[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack_from(">I", head, xing + 4)[0]
+        if flags & 1:
+            frames = struct.unpack_from(">I", head, xing + 8)[0]
+            samples = frames * samples_per_frame
+            # A LAME tag (written by LAME and by ffmpeg as "Lavc...") follows
+            # with the encoder delay and padding that decoders trim for gapless playback
+            lame = xing + 12 + 4 * bool(flags & 2) + 100 * bool(flags & 4) + 4 * bool(flags & 8)
+            if lame + 24 <= len(head) and head[lame:lame + 4].isalnum():
+                delay_padding = int.from_bytes(head[lame + 21:lame + 24], "big")
+                samples -= (delay_padding >> 12) + (delay_padding & 0xFFF)
+            return max(samples, 0) / sample_rate
+
+    vbri = offset + 4 + 32
+    if head[vbri:vbri + 4] == b"VBRI" and vbri + 18 <= len(head):
+        frames = struct.unpack_from(">I", head, vbri + 14)[0]
+        return frames * samples_per_frame / sample_rate
+
+    if not bitrate:
+        return None
+    # Constant bitrate: every byte after the tag is audio
+    return (file_size - offset) * 8 / (bitrate * 1000)
+
+
+def find_mp3_frame(head, offset):
+    """
+    (offset, version, layer, bitrate kbps, sample rate, mono) of the first MPEG
+    audio frame at or after offset whose successor is also a valid frame
+    """
+    limit = len(head) - 4
+    while offset < limit:
+        offset = head.find(b"\xff", offset, limit)
+        if offset < 0:
+            return None
+        frame = parse_mp3_header(head, offset)
+        if frame is not None:
+            version, layer, bitrate, sample_rate, mono, frame_size = frame
+            following = offset + frame_size
+            # A single sync pattern can appear inside other data; require a second frame
+            if not frame_size or following + 4 > len(head) or parse_mp3_header(head, following):
+                return offset, version, layer, bitrate, sample_rate, mono
+        offset += 1
+    return None
+
+
+def parse_mp3_header(head, offset):
+    """(version, layer, bitrate kbps, sample rate, mono, frame size) of the header at offset, or None"""
+    b1, b2, b3 = head[offset + 1], head[offset + 2], head[offset + 3]
+    if head[offset] != 0xFF or b1 & 0xE0 != 0xE0:
+        return None
+    version = (b1 >> 3) & 3
+    layer = (b1 >> 1) & 3
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 3
+    if version == 1 or layer == 0 or bitrate_index == 15 or sample_rate_index == 3:
+        return None
+
+    bitrate = (MPEG1_BITRATES if version == 3 else MPEG2_BITRATES)[layer][bitrate_index]
+    sample_rate = MPEG_SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 1
+    mono = (b3 >> 6) == 3
+    if not bitrate:
+        frame_size = 0
+    elif layer == 3:
+        frame_size = (12 * bitrate * 1000 // sample_rate + padding) * 4
+    else:
+        coefficient = 144 if layer == 2 or version == 3 else 72
+        frame_size = coefficient * bitrate * 1000 // sample_rate + padding
+    return version, layer, bitrate, sample_rate, mono, frame_size
+
+
+def probe_duration(audio_file):
+    """Container duration reported by ffprobe, or None if ffprobe is missing or fails"""
+    if shutil.which("ffprobe") is None:
+        return None
+    result = subprocess.run([
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        audio_file
+    ], capture_output=True, text=True)
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return None
+
+
+def get_loudnorm_filter(normalize=True):
+    """The loudness normalization filter to append to the narration, or None"""
+    if not normalize or LOUDNORM_FILTER.strip().lower() in ("", "off", "none", "0"):
+        return None
+    return LOUDNORM_FILTER
+
+
+def build_audio_concat_args(audio_files, first_input_index=1, normalize=True):
+    """
+    ffmpeg input and filter arguments that join narration clips into one track.
+
+    The clips are concatenated and loudness normalized (see LOUDNORM_FILTER)
+    in the same filtergraph. Returns (input_args, filter_complex, audio_label).
+    """
+    input_args = []
+    labels = ""
+    for i, audio_file in enumerate(audio_files):
+        input_args += ["-i", audio_file]
+        labels += f"[{first_input_index + i}:a]"
+    filter_complex = f"{labels}concat=n={len(audio_files)}:v=0:a=1"
+    loudnorm = get_loudnorm_filter(normalize)
+    if loudnorm:
+        filter_complex += f",{loudnorm}"
+    return input_args, filter_complex + "[aout]", "[aout]"
+
+
+def concat_audio(audio_files, output_path, audio_bitrate="192k", normalize=True):
+    """
+    Join narration clips into one loudness-normalized AAC track in a single ffmpeg run.
+
+    Uses the same concat / loudnorm filtergraph and AAC parameters as the
+    video encoders, so the track can be muxed into a video by stream copy.
+    """
+    audio_inputs, filter_complex, audio_label = build_audio_concat_args(audio_files, first_input_index=0, normalize=normalize)
+    command = [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        *audio_inputs,
+        "-filter_complex", filter_complex,
+        "-map", audio_label,
+        "-c:a", "aac", "-b:a", audio_bitrate, "-ar", "44100", "-ac", "2",
+        output_path
+    ]
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        raise Exception(f"ffmpeg audio concat failed: {result.stderr.decode(errors='replace').strip()}")
+    return output_path
+
+
+def detect_silences(audio_file, noise="-40dB", min_duration=0.3):
+    """(start, end) of every stretch quieter than noise for at least min_duration seconds, via ffmpeg silencedetect"""
+    result = subprocess.run([
+        "ffmpeg", "-hide_banner", "-nostats",
+        "-i", audio_file,
+        "-af", f"silencedetect=noise={noise}:d={min_duration}",
+        "-f", "null", "-"
+    ], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise Exception(f"ffmpeg silence detection failed: {result.stderr.strip()}")
+
+    silences = []
+    start = None
+    for line in result.stderr.splitlines():
+        if "silence_start:" in line:
+            start = float(line.split("silence_start:", 1)[1].split()[0])
+        elif "silence_end:" in line and start is not None:
+            silences.append((start, float(line.split("silence_end:", 1)[1].split()[0])))
+            start = None
+    if start is not None:
+        # Silence running to the end of the file
+        silences.append((start, None))
+    return silences
+
+
+def split_audio(audio_file, spans, output_files, audio_bitrate="128k"):
+    """
+    Cut the (start, end) spans (seconds; end None for the end of the file) of an audio file into one MP3 file each.
+
+    The source is decoded once; each output is trimmed sample-accurately
+    with atrim and encoded with libmp3lame, whose LAME tag lets
+    get_audio_duration report the exact trimmed length.
+    """
+    if len(output_files) != len(spans):
+        raise ValueError("split_audio needs one output file per span")
+    command = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-i", audio_file]
+    for output_file, (start, end) in zip(output_files, spans):
+        trim = f"atrim=start={start:.6f}" + (f":end={end:.6f}" if end is not None else "")
+        command += [
+            "-map", "0:a",
+            "-af", f"{trim},asetpts=PTS-STARTPTS",
+            "-c:a", "libmp3lame", "-b:a", audio_bitrate,
+            output_file
+        ]
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        raise Exception(f"ffmpeg audio split failed: {result.stderr.decode(errors='replace').strip()}")
+    return output_files
@@ -0,0 +1,73 @@
+"""
+Benchmark the captions.ai subtitle renderers on synthetic frames.
+
+Run from the Flask directory:
+    python -m video.bench_captions --width 1080 --height 1920 --frames 240
+"""
+import argparse
+import time
+import numpy as np
+
+from video.captions import CaptionCompositor
+from video.video_gen import create_captionsai_style_frame, create_estimated_word_timestamps, load_font
+
+SAMPLE_TEXT = (
+    "Isaac Newton sat beneath the apple tree wondering why things always fall down "
+    "and never sideways, and that simple question changed physics forever"
+)
+
+
+def make_windows(words_with_timestamps, window_size=8):
+    """Build (window, relative index) pairs the same way add_dynamic_subtitles does"""
+    windows = []
+    for current_word_idx in range(len(words_with_timestamps)):
+        window_start = max(0, current_word_idx - window_size // 2)
+        window_end = min(len(words_with_timestamps), window_start + window_size)
+        windows.append((words_with_timestamps[window_start:window_end], current_word_idx - window_start))
+    return windows
+
+
+def run_benchmark(width, height, frames):
+    font = load_font(int(height * 0.05), bold=True)
+    color_scheme = {"text": (255, 255, 255), "highlight": (255, 230, 0), "shadow": (0, 0, 0)}
+    words = create_estimated_word_timestamps(SAMPLE_TEXT, 10.0)
+    windows = make_windows(words)
+
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+
+    # Reference PIL path
+    start = time.perf_counter()
+    for i in range(frames):
+        window, idx = windows[i % len(windows)]
+        create_captionsai_style_frame(background.copy(), window, idx, width, height, font=font, color_scheme=color_scheme)
+    pil_fps = frames / (time.perf_counter() - start)
+
+    # Sprite compositor (sprite rasterization is included in the timing)
+    compositor = CaptionCompositor(width, height, font=font, color_scheme=color_scheme)
+    start = time.perf_counter()
+    for i in range(frames):
+        window, idx = windows[i % len(windows)]
+        compositor.render(background.copy(), window, idx)
+    numpy_fps = frames / (time.perf_counter() - start)
+
+    # Pixel parity between the two paths
+    max_diff = 0
+    for window, idx in windows:
+        expected = create_captionsai_style_frame(background.copy(), window, idx, width, height, font=font, color_scheme=color_scheme)
+        actual = compositor.render(background.copy(), window, idx)
+        max_diff = max(max_diff, int(np.abs(expected.astype(np.int16) - actual.astype(np.int16)).max()))
+
+    print(f"Frame size: {width}x{height}, frames: {frames}")
+    print(f"PIL round trip:     {pil_fps:8.1f} fps")
+    print(f"Sprite compositor:  {numpy_fps:8.1f} fps ({numpy_fps / pil_fps:.1f}x)")
+    print(f"Max channel difference vs PIL: {max_diff}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark captions.ai subtitle rendering")
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--height", type=int, default=1920)
+    parser.add_argument("--frames", type=int, default=240)
+    args = parser.parse_args()
+    run_benchmark(args.width, args.height, args.frames)
@@ -0,0 +1,196 @@
+import math
+import numpy as np
+from PIL import Image, ImageDraw
+
+from video.fonts import get_text_dimensions
+
+# Layout constants shared with create_captionsai_style_frame in video_gen.py
+EXTRA_WORD_SPACING = 8
+LINE_SPACING_FACTOR = 1.5
+GLOW_PADDING = 4
+GLOW_RADIUS = 8
+GLOW_ALPHA = 60
+SHADOW_OFFSET = 1
+SHADOW_ALPHA = 100
+
+DEFAULT_COLOR_SCHEME = {"text": (255, 255, 255), "highlight": (255, 230, 0), "shadow": (0, 0, 0)}
+
+
+class CaptionCompositor:
+    """
+    Captions.ai style subtitle renderer that works directly on BGR numpy frames.
+
+    Every word is rasterized once with PIL into a premultiplied-alpha sprite
+    (a normal and a highlighted variant) and cached. Rendering a frame is then
+    just a handful of integer blends of those sprites into the frame, in place,
+    with no BGR -> RGB -> PIL -> RGBA round trip.
+    """
+
+    def __init__(self, frame_width, frame_height, font=None, color_scheme=None, scale=1.0):
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.font = font
+
+        # Pixel constants follow the render resolution (see video.profiles);
+        # at scale 1 they are exactly the create_captionsai_style_frame values
+        scaled = lambda value: value if scale == 1.0 else max(1, int(round(value * scale)))
+        self.word_spacing = scaled(EXTRA_WORD_SPACING)
+        self.glow_padding = scaled(GLOW_PADDING)
+        self.glow_radius = scaled(GLOW_RADIUS)
+        self.shadow_offset = scaled(SHADOW_OFFSET)
+
+        if color_scheme is None:
+            color_scheme = DEFAULT_COLOR_SCHEME
+        self.text_color = (*color_scheme["text"], 255)
+        self.highlight_color = (*color_scheme["highlight"], 255)
+        self.shadow_color = (*color_scheme["shadow"], SHADOW_ALPHA)
+
+        self.max_width = int(frame_width * 0.8)
+        self.bottom_padding = int(frame_height * 0.1)
+        _, self.line_height = get_text_dimensions("Ay", font)
+
+        # (word, highlighted, y offset) -> (premultiplied BGR, inverse alpha, dx, dy)
+        self._sprites = {}
+        # Words of a caption window -> placed words; a window is laid out once
+        self._layouts = {}
+
+    def layout(self, words_to_display):
+        """
+        Wrap the caption window into centred lines.
+
+        Returns a list of (word, x, y) positions in frame coordinates, using
+        exactly the same wrapping rules as create_captionsai_style_frame.
+        The result is cached per window, so treat it as read-only.
+        """
+        key = tuple(word["word"] for word in words_to_display)
+        placed = self._layouts.get(key)
+        if placed is None:
+            placed = self._layout(key)
+            self._layouts[key] = placed
+        return placed
+
+    def _layout(self, window_words):
+        full_text = " ".join(window_words)
+
+        wrapped_lines = []
+        current_line = []
+        current_width = 0
+
+        for word in full_text.split():
+            word_only_width, _ = get_text_dimensions(word, self.font)
+
+            if current_width + word_only_width + (self.word_spacing if current_line else 0) <= self.max_width:
+                current_line.append((word, word_only_width))
+                current_width += word_only_width + (self.word_spacing if len(current_line) > 1 else 0)
+            else:
+                wrapped_lines.append((current_line, current_width))
+                current_line = [(word, word_only_width)]
+                current_width = word_only_width
+
+        if current_line:
+            wrapped_lines.append((current_line, current_width))
+
+        line_step = self.line_height * LINE_SPACING_FACTOR
+        text_block_height = len(wrapped_lines) * line_step
+        y_position = self.frame_height - self.bottom_padding - text_block_height
+
+        placed = []
+        for line_idx, (line_words, line_width) in enumerate(wrapped_lines):
+            x = (self.frame_width - line_width) // 2
+            line_y = y_position + line_idx * line_step
+            for word, word_width in line_words:
+                placed.append((word, x, line_y))
+                x += word_width + self.word_spacing
+
+        return placed
+
+    def render(self, frame, words_to_display, current_word_idx):
+        """Blend the caption window onto a BGR frame in place and return it"""
+        for i, (word, x, y) in enumerate(self.layout(words_to_display)):
+            self._blend(frame, word, i == current_word_idx, x, y)
+        return frame
+
+    def _get_sprite(self, word, highlighted, offset_y):
+        key = (word, highlighted, offset_y)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            sprite = self._rasterize(word, highlighted, offset_y)
+            self._sprites[key] = sprite
+        return sprite
+
+    def _rasterize(self, word, highlighted, offset_y):
+        """Draw one word exactly like the PIL path does, on its own transparent canvas"""
+        word_width, _ = get_text_dimensions(word, self.font)
+        line_height = self.line_height
+
+        # Generous canvas; the word origin sits at (margin, margin + offset_y) and
+        # the result is cropped to its visible pixels afterwards. The margin is
+        # even so PIL's round-half-even on the glow box lands on the same pixels
+        # as it would in the full frame.
+        margin = 2 * (self.glow_padding + line_height)
+        canvas_w = word_width + 2 * margin
+        canvas_h = line_height + 2 * margin
+        canvas = Image.new('RGBA', (canvas_w, canvas_h), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(canvas)
+
+        x = margin
+        y = margin + offset_y
+        color = self.highlight_color if highlighted else self.text_color
+
+        if highlighted:
+            word_box = [
+                x - self.glow_padding,
+                y - self.glow_padding,
+                x + word_width + self.glow_padding,
+                y + line_height + self.glow_padding
+            ]
+            fill = (self.highlight_color[0], self.highlight_color[1], self.highlight_color[2], GLOW_ALPHA)
+            try:
+                draw.rounded_rectangle(word_box, radius=self.glow_radius, fill=fill)
+            except AttributeError:
+                draw.rectangle(word_box, fill=fill)
+
+        draw.text((x + self.shadow_offset, y + self.shadow_offset), word, font=self.font, fill=self.shadow_color)
+        draw.text((x, y), word, font=self.font, fill=color)
+
+        bbox = canvas.getchannel('A').getbbox()
+        if bbox is None:
+            return None
+        left, top = bbox[:2]
+
+        rgba = np.asarray(canvas.crop(bbox), dtype=np.uint16)
+        alpha = rgba[:, :, 3:4]
+        # Premultiplied BGR so a blend is one multiply-add per channel
+        premultiplied = np.ascontiguousarray(rgba[:, :, 2::-1] * alpha)
+        inverse_alpha = 255 - alpha
+        return premultiplied, inverse_alpha, left - margin, top - margin
+
+    def _blend(self, frame, word, highlighted, x, y):
+        # Line positions can be fractional (1.5x line spacing); sprites are keyed
+        # on the position modulo 2 so subpixel text and rounding match exactly.
+        base_y = 2 * math.floor(y / 2)
+        sprite = self._get_sprite(word, highlighted, y - base_y)
+        if sprite is None:
+            return
+        premultiplied, inverse_alpha, dx, dy = sprite
+
+        x0 = int(x) + dx
+        y0 = base_y + dy
+        h, w = premultiplied.shape[:2]
+
+        # Clip the sprite against the frame edges
+        fx0, fy0 = max(x0, 0), max(y0, 0)
+        fx1, fy1 = min(x0 + w, frame.shape[1]), min(y0 + h, frame.shape[0])
+        if fx0 >= fx1 or fy0 >= fy1:
+            return
+        sx0, sy0 = fx0 - x0, fy0 - y0
+        sx1, sy1 = sx0 + (fx1 - fx0), sy0 + (fy1 - fy0)
+
+        region = frame[fy0:fy1, fx0:fx1]
+        # dst * (255 - a) + src * a stays below 2**16, so uint16 is enough
+        blended = region.astype(np.uint16)
+        blended *= inverse_alpha[sy0:sy1, sx0:sx1]
+        blended += premultiplied[sy0:sy1, sx0:sx1]
+        blended += 127
+        blended //= 255
+        region[...] = blended
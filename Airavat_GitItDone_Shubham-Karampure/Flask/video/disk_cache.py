@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+from video.metrics import current_trace
+
+
+def stable_digest(*parts):
+    """SHA-256 hex digest of JSON-serializable parts, stable across processes and runs"""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Content-addressed file cache with a size cap and LRU eviction.
+
+    Entries live at <directory>/<key[:2]>/<key><suffix>. Writes go to a temp
+    file in the same directory and are moved into place with os.replace, so
+    readers in other processes never see a partial entry and concurrent
+    writers of the same key simply race to an identical result. A hit touches
+    the entry's mtime, which is the LRU clock used by eviction.
+
+    With a name, hits and misses are also counted in the active render trace
+    as <name>_cache_hits / <name>_cache_misses (see video.metrics).
+    """
+
+    def __init__(self, directory, max_bytes, suffix="", name=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._approx_bytes = None
+        self._lock = threading.Lock()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    def get(self, key):
+        """Path of the cached entry for key, or None on a miss"""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            if self.name:
+                current_trace().count(f"{self.name}_cache_misses")
+            return None
+        with self._lock:
+            self.hits += 1
+        if self.name:
+            current_trace().count(f"{self.name}_cache_hits")
+        return path
+
+    def put_bytes(self, key, data):
+        """Store data under key atomically and return the entry path"""
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._account(len(data))
+        return path
+
+    def get_json(self, key):
+        """Decoded JSON entry for key, or None on a miss"""
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put_json(self, key, value):
+        """Store a JSON-serializable value under key"""
+        return self.put_bytes(key, json.dumps(value).encode("utf-8"))
+
+    def put_file(self, key, source_path):
+        """Copy an existing file into the cache under key and return the entry path"""
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp_")
+        try:
+            # Streamed, so large files (encoded segments) are never read into memory whole
+            with os.fdopen(fd, "wb") as f, open(source_path, "rb") as source:
+                shutil.copyfileobj(source, f, 1 << 20)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._account(os.path.getsize(path))
+        return path
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def _entries(self):
+        """(mtime, size, path) of every entry currently on disk"""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.startswith(".tmp_"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _account(self, added_bytes):
+        with self._lock:
+            if self._approx_bytes is None:
+                self._approx_bytes = sum(size for _, size, _ in self._entries())
+            else:
+                self._approx_bytes += added_bytes
+            if self._approx_bytes > self.max_bytes:
+                self._approx_bytes = self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits; returns the new size"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        # Evict down to 90% so every put does not trigger another scan
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                # Another process evicted it first, or it is open on Windows
+                continue
+        return total
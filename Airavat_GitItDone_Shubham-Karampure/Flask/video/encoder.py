@@ -0,0 +1,325 @@
+import os
+import subprocess
+
+from video.audio import build_audio_concat_args, get_loudnorm_filter
+
+
+class FFmpegFrameWriter:
+    """
+    Encode raw BGR frames with a single ffmpeg libx264 process fed over stdin.
+
+    The narration clips are passed as extra inputs, joined and loudness
+    normalized (see video.audio) and muxed in the same invocation, so the rendered frames are encoded exactly once and no
+    intermediate video file is written.
+
+    Usage:
+        with FFmpegFrameWriter(output_path, width, height, fps, audio_files) as writer:
+            writer.write(frame)
+    """
+
+    def __init__(self, output_path, width, height, fps=24, audio_files=None, preset="medium", crf=23, audio_bitrate="192k",
+                 keyframe_interval=None):
+        self.output_path = output_path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.audio_files = audio_files or []
+        self.preset = preset
+        self.crf = crf
+        self.audio_bitrate = audio_bitrate
+        self.keyframe_interval = keyframe_interval
+        self.frames_written = 0
+        self.process = None
+
+    def build_command(self):
+        """Full ffmpeg command line for this writer"""
+        command = [
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "rawvideo",
+            "-pix_fmt", "bgr24",
+            "-s", f"{self.width}x{self.height}",
+            "-r", str(self.fps),
+            "-i", "-",
+        ]
+
+        if self.audio_files:
+            audio_inputs, filter_complex, audio_label = build_audio_concat_args(self.audio_files)
+            command += audio_inputs
+            command += ["-filter_complex", filter_complex, "-map", "0:v", "-map", audio_label]
+
+        command += [
+            "-c:v", "libx264",
+            "-preset", self.preset,
+            "-crf", str(self.crf),
+            "-pix_fmt", "yuv420p",
+            *keyframe_args(self.keyframe_interval),
+        ]
+        if self.audio_files:
+            # Same audio parameters as encode_still_segment so chunks concat cleanly
+            command += ["-c:a", "aac", "-b:a", self.audio_bitrate, "-ar", "44100", "-ac", "2"]
+        command += ["-movflags", "+faststart", self.output_path]
+        return command
+
+    def open(self):
+        self.process = subprocess.Popen(
+            self.build_command(),
+            stdin=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        return self
+
+    def write(self, frame):
+        """Write one BGR uint8 frame of shape (height, width, 3)"""
+        if frame.shape[:2] != (self.height, self.width):
+            raise ValueError(f"Frame size {frame.shape[1]}x{frame.shape[0]} does not match {self.width}x{self.height}")
+        try:
+            # A C-contiguous frame is handed to the pipe without another copy
+            self.process.stdin.write(frame.data if frame.flags["C_CONTIGUOUS"] else frame.tobytes())
+        except BrokenPipeError:
+            self._raise_ffmpeg_error()
+        self.frames_written += 1
+
+    def close(self):
+        if self.process is None:
+            return
+        process, self.process = self.process, None
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        stderr = process.stderr.read()
+        process.wait()
+        if process.returncode != 0:
+            raise Exception(f"ffmpeg encode failed ({process.returncode}): {stderr.decode(errors='replace').strip()}")
+
+    def abort(self):
+        """Stop ffmpeg without waiting for a complete file"""
+        if self.process is None:
+            return
+        process, self.process = self.process, None
+        process.kill()
+        process.wait()
+
+    def _raise_ffmpeg_error(self):
+        process, self.process = self.process, None
+        process.wait()
+        stderr = process.stderr.read().decode(errors="replace").strip()
+        raise Exception(f"ffmpeg exited while frames were being written ({process.returncode}): {stderr}")
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def keyframe_args(keyframe_interval):
+    """
+    x264 arguments forcing a keyframe every keyframe_interval seconds (None: encoder default).
+
+    Segmenters (see video.streaming) can only cut at keyframes, so this bounds
+    how far a segment can run past its target duration.
+    """
+    if not keyframe_interval:
+        return []
+    return ["-force_key_frames", f"expr:gte(t,n_forced*{keyframe_interval})"]
+
+
+def escape_filter_path(path):
+    """Escape a file path for use inside an ffmpeg filter argument"""
+    path = str(path).replace("\\", "/")
+    return path.replace(":", "\\:").replace("'", "\\'")
+
+
+def encode_still_segment(image_file, audio_file, duration, output_path, width, height, fps=24,
+                         subtitle_file=None, preset="medium", crf=23, audio_bitrate="192k", keyframe_interval=None):
+    """
+    Encode one still image plus its narration as a standalone segment.
+
+    The image is looped by ffmpeg (-loop 1 -tune stillimage) and centred on a
+    width x height black canvas; an optional subtitle file is burned in during
+    the same encode, and the narration is loudness normalized like the joined
+    track of the single-encode paths. All segments share codec parameters so
+    they can be joined with concat_segments without re-encoding.
+    """
+    video_filter = f"scale=w='min(iw,{width})':h='min(ih,{height})':force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black,setsar=1"
+    if subtitle_file:
+        video_filter += f",subtitles='{escape_filter_path(subtitle_file)}'"
+
+    command = [
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        "-loop", "1", "-framerate", str(fps), "-i", image_file,
+        "-i", audio_file,
+        "-vf", video_filter,
+    ]
+    loudnorm = get_loudnorm_filter()
+    if loudnorm:
+        command += ["-af", loudnorm]
+    command += [
+        "-t", f"{duration:.3f}",
+        "-c:v", "libx264", "-tune", "stillimage",
+        "-preset", preset, "-crf", str(crf),
+        "-pix_fmt", "yuv420p", "-r", str(fps),
+        *keyframe_args(keyframe_interval),
+        "-c:a", "aac", "-b:a", audio_bitrate, "-ar", "44100", "-ac", "2",
+        output_path
+    ]
+    result = subprocess.run(command, capture_output=True)
+    if result.returncode != 0:
+        raise Exception(f"ffmpeg segment encode failed for {image_file}: {result.stderr.decode(errors='replace').strip()}")
+    return output_path
+
+
+def concat_segments(segment_files, output_path, list_file=None):
+    """Join encoded segments with the concat demuxer, copying the streams"""
+    list_file = list_file or output_path + ".concat.txt"
+    with open(list_file, "w", encoding="utf-8") as f:
+        for segment_file in segment_files:
+            # The concat demuxer quotes with single quotes
+            safe_path = str(segment_file).replace("\\", "/").replace("'", "'\\''")
+            f.write(f"file '{safe_path}'\n")
+
+    try:
+        result = subprocess.run([
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", list_file,
+            "-c", "copy",
+            "-movflags", "+faststart",
+            output_path
+        ], capture_output=True)
+    finally:
+        if os.path.exists(list_file):
+            os.remove(list_file)
+
+    if result.returncode != 0:
+        raise Exception(f"ffmpeg concat failed: {result.stderr.decode(errors='replace').strip()}")
+    return output_path
+
+
+def mux_audio(video_file, audio_file, output_path, video_args=None):
+    """
+    Combine the video stream of video_file with the audio stream of audio_file.
+
+    Both streams are copied unless video_args (e.g. libx264 options) asks for
+    the video to be re-encoded; the audio is never decoded.
+    """
+    result = subprocess.run([
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+        "-i", video_file, "-i", audio_file,
+        "-map", "0:v:0", "-map", "1:a:0",
+        *(video_args or ["-c:v", "copy"]),
+        "-c:a", "copy",
+        "-movflags", "+faststart",
+        output_path
+    ], capture_output=True)
+    if result.returncode != 0:
+        raise Exception(f"ffmpeg mux failed: {result.stderr.decode(errors='replace').strip()}")
+    return output_path
+
+
+def fit_filter(width, height, fit="pad"):
+    """
+    Filter chain that brings a frame to exactly width x height.
+
+    "pad" scales it to fit and letterboxes it on black; "crop" scales it to
+    cover the frame and cuts off the centred overflow.
+    """
+    if fit == "crop":
+        return f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height},setsar=1"
+    return (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black,setsar=1")
+
+
+def encode_slideshow(image_files, audio_files, durations, output_path, width, height, fps=24,
+                     subtitle_file=None, fonts_dir=None, preset="medium", crf=23, audio_bitrate="192k", progress=None,
+                     keyframe_interval=None):
+    """
+    Encode a sequence of still images with their narration in one ffmpeg run.
+
+    Each image is looped for its clip's duration and centred on a width x
+    height black canvas, the stills are joined with the concat filter and an
+    optional ASS/SRT file is burned in by libass during the same encode; the
+    narration is joined and loudness normalized in the same filtergraph.
+    progress(stage, fraction) is fed from ffmpeg's frame counter.
+    """
+    return encode_slideshow_outputs(
+        image_files, audio_files, durations, [(output_path, width, height, subtitle_file)], width, height, fps=fps,
+        fonts_dir=fonts_dir, preset=preset, crf=crf, audio_bitrate=audio_bitrate, progress=progress,
+        keyframe_interval=keyframe_interval
+    )[0]
+
+
+def encode_slideshow_outputs(image_files, audio_files, durations, outputs, width, height, fps=24, fonts_dir=None,
+                             preset="medium", crf=23, audio_bitrate="192k", fit="pad", progress=None, keyframe_interval=None):
+    """
+    encode_slideshow with several outputs (e.g. aspect ratios) from one decode.
+
+    outputs is a list of (output_path, width, height, subtitle_file). The
+    stills are decoded, composed on the width x height canvas and joined
+    once; the result is split, and every branch is brought to its own size
+    (see fit_filter) and gets its own burned-in subtitles before its encode.
+    The narration track is built once and split the same way. Returns the
+    output paths.
+    """
+    command = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error"]
+    for image_file, duration in zip(image_files, durations):
+        command += ["-loop", "1", "-framerate", str(fps), "-t", f"{duration:.3f}", "-i", image_file]
+    audio_inputs, audio_filter, audio_label = build_audio_concat_args(audio_files, first_input_index=len(image_files))
+    command += audio_inputs
+
+    filters = []
+    labels = ""
+    for i in range(len(image_files)):
+        filters.append(
+            f"[{i}:v]scale=w='min(iw,{width})':h='min(ih,{height})':force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black,setsar=1,fps={fps}[v{i}]"
+        )
+        labels += f"[v{i}]"
+    filters.append(f"{labels}concat=n={len(image_files)}:v=1:a=0[base]")
+    filters.append(audio_filter)
+    if len(outputs) > 1:
+        filters.append("[base]split=" + str(len(outputs)) + "".join(f"[base{i}]" for i in range(len(outputs))))
+        filters.append(f"{audio_label}asplit={len(outputs)}" + "".join(f"[aout{i}]" for i in range(len(outputs))))
+        branches = [(f"[base{i}]", f"[aout{i}]") for i in range(len(outputs))]
+    else:
+        branches = [("[base]", audio_label)]
+
+    total_frames = int(round(sum(durations) * fps))
+    output_args = []
+    for i, ((output_path, output_width, output_height, subtitle_file), (video_label, branch_audio)) in enumerate(zip(outputs, branches)):
+        chain = []
+        if (output_width, output_height) != (width, height):
+            chain.append(fit_filter(output_width, output_height, fit))
+        if subtitle_file:
+            subtitles = f"subtitles='{escape_filter_path(subtitle_file)}'"
+            if fonts_dir:
+                subtitles += f":fontsdir='{escape_filter_path(fonts_dir)}'"
+            chain.append(subtitles)
+        filters.append(f"{video_label}{','.join(chain) or 'null'}[vout{i}]")
+        output_args += [
+            "-map", f"[vout{i}]", "-map", branch_audio,
+            "-frames:v", str(total_frames),
+            "-c:v", "libx264", "-tune", "stillimage",
+            "-preset", preset, "-crf", str(crf),
+            "-pix_fmt", "yuv420p", "-r", str(fps),
+            *keyframe_args(keyframe_interval),
+            "-c:a", "aac", "-b:a", audio_bitrate, "-ar", "44100", "-ac", "2",
+            "-movflags", "+faststart",
+            output_path
+        ]
+    command += ["-filter_complex", ";".join(filters), "-progress", "pipe:1", "-nostats"] + output_args
+
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    for line in process.stdout:
+        # -progress prints key=value lines; frame= is the number of frames encoded so far
+        if progress and line.startswith("frame=") and total_frames:
+            progress("rendering", int(line.split("=", 1)[1]) / total_frames)
+    stderr = process.stderr.read()
+    process.wait()
+    if process.returncode != 0:
+        raise Exception(f"ffmpeg slideshow encode failed ({process.returncode}): {stderr.strip()}")
+    return [output_path for output_path, _, _, _ in outputs]
@@ -0,0 +1,131 @@
+import platform
+import threading
+import weakref
+from pathlib import Path
+
+from PIL import ImageFont
+
+# Per-font text measurement caches are cleared past this many entries
+MAX_CACHED_MEASUREMENTS = 50000
+
+
+def get_system_fonts():
+    """Get available system fonts based on OS"""
+    system = platform.system()
+    font_paths = []
+
+    if system == "Windows":
+        font_dir = Path("C:/Windows/Fonts")
+        font_paths = [font_dir / "Arial.ttf", font_dir / "arialbd.ttf"]
+    elif system == "Darwin":  # macOS
+        font_paths = [
+            Path("/System/Library/Fonts/Supplemental/Arial.ttf"),
+            Path("/System/Library/Fonts/Supplemental/Arial Bold.ttf")
+        ]
+    else:  # Linux
+        font_paths = [
+            Path("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"),
+            Path("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf")
+        ]
+
+    return font_paths
+
+
+def measure_text(text, font):
+    """Get text dimensions with fallback (uncached)"""
+    text = text.strip()
+    if font is None:
+        return len(text) * 8, 16
+
+    try:
+        if hasattr(font, "getbbox"):
+            bbox = font.getbbox(text)
+            return bbox[2] - bbox[0], bbox[3] - bbox[1]
+        elif hasattr(font, "getsize"):
+            return font.getsize(text)
+        else:
+            return len(text) * (font.size // 2), font.size
+    except:
+        return len(text) * 8, 16
+
+
+class FontManager:
+    """
+    Process-wide cache of caption fonts and their text measurements.
+
+    Each (size, bold) face is opened once, the system font paths are probed
+    once, and every measured string is remembered per font, so wrapping and
+    drawing the same words again costs a dict lookup instead of a FreeType
+    layout.
+    """
+
+    def __init__(self):
+        self._fonts = {}
+        self._font_paths = None
+        self._measurements = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def font_paths(self, bold=True):
+        """Existing system font files, bold faces first when bold is set"""
+        if self._font_paths is None:
+            self._font_paths = [path for path in get_system_fonts() if path.exists()]
+        font_paths = self._font_paths
+        if bold:
+            is_bold = lambda p: "bold" in p.name.lower() or "bd" in p.name.lower()
+            font_paths = [p for p in font_paths if is_bold(p)] + [p for p in font_paths if not is_bold(p)]
+        return font_paths
+
+    def get_font(self, size, bold=True):
+        """Load system font with fallback; the same object is returned for every call"""
+        key = (size, bold)
+        font = self._fonts.get(key)
+        if font is not None:
+            return font
+
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is None:
+                font = self._load(size, bold)
+                self._fonts[key] = font
+        return font
+
+    def _load(self, size, bold):
+        for font_path in self.font_paths(bold):
+            try:
+                return ImageFont.truetype(str(font_path), size)
+            except (IOError, OSError):
+                continue
+        return ImageFont.load_default()
+
+    def text_dimensions(self, text, font):
+        """Memoized measure_text"""
+        if font is None:
+            return measure_text(text, font)
+        try:
+            cache = self._measurements.get(font)
+        except TypeError:
+            # Font type that cannot be weakly referenced
+            return measure_text(text, font)
+        if cache is None:
+            cache = {}
+            self._measurements[font] = cache
+        dimensions = cache.get(text)
+        if dimensions is None:
+            if len(cache) >= MAX_CACHED_MEASUREMENTS:
+                cache.clear()
+            dimensions = measure_text(text, font)
+            cache[text] = dimensions
+        return dimensions
+
+
+font_manager = FontManager()
+
+
+def load_font(size, bold=True):
+    """Load system font with fallback (cached per process, see FontManager)"""
+    return font_manager.get_font(size, bold)
+
+
+def get_text_dimensions(text, font):
+    """Get text dimensions with fallback (memoized per font, see FontManager)"""
+    return font_manager.text_dimensions(text, font)
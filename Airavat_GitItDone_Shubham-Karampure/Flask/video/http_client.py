@@ -0,0 +1,91 @@
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("VIDEO_ASSET_CONCURRENCY", "8"))
+
+
+def create_session(max_concurrency=DEFAULT_MAX_CONCURRENCY, retries=3, backoff_factor=0.5, post_retry_prefixes=()):
+    """
+    requests session for asset downloads and TTS calls.
+
+    Connections are pooled per host (up to max_concurrency each) and reused
+    across requests. Connection errors, 429 and 5xx responses of GETs are
+    retried with exponential backoff, honouring Retry-After. POSTs are not
+    idempotent (a TTS request may already be synthesized and billed when it
+    times out or fails with a 5xx), so they are only retried when the
+    connection could not be made or, for URLs under post_retry_prefixes
+    (e.g. the TTS API), on 429.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    if post_retry_prefixes:
+        # A rate-limited request was rejected before any work was done
+        post_retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            other=0,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=[429],
+            allowed_methods=["GET", "POST"],
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        post_adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency, max_retries=post_retry)
+        for prefix in post_retry_prefixes:
+            session.mount(prefix, post_adapter)
+    return session
+
+
+def map_concurrently(fn, items, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """
+    Call fn on every item with at most max_concurrency calls in flight.
+
+    Results are returned in the order of items. If any call fails, the
+    remaining calls are still awaited and the first error is raised together
+    with the results that did succeed (as exc.partial_results), so the caller
+    can clean up files that were already written.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(items)))) as pool:
+        # Each call runs in a copy of the caller's context (e.g. the active render trace)
+        futures = [pool.submit(contextvars.copy_context().run, fn, item) for item in items]
+
+    results = []
+    first_error = None
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(None)
+            if first_error is None:
+                first_error = e
+
+    if first_error is not None:
+        first_error.partial_results = results
+        raise first_error
+    return results
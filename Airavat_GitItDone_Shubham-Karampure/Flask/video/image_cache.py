@@ -0,0 +1,150 @@
+"""
+Persistent cache of the panel images renders download.
+
+Images are stored by content digest, and a URL index records for each URL
+the digest of its last response with the ETag, Last-Modified and the time
+until which the response is fresh (Cache-Control max-age or Expires). A
+fetch of a fresh URL skips the network; a stale one is revalidated with
+If-None-Match / If-Modified-Since, and a 304 reuses the stored image.
+
+Downscaled copies of each image (see video.images.scale_image) are cached
+per content digest and scale, so a repeat render of the same comic at the
+same profile skips the full-size decode and resample as well. Each part is
+a DiskCache with its own LRU size cap.
+"""
+import email.utils
+import hashlib
+import os
+import re
+import shutil
+import time
+
+import requests
+
+from video.disk_cache import DiskCache, file_digest, stable_digest
+from video.images import scale_image
+from video.metrics import current_trace
+
+# Freshness assumed when a response says nothing about it; 0 revalidates every time
+DEFAULT_FRESH_SECONDS = float(os.environ.get("IMAGE_CACHE_FRESH_SECONDS", "0"))
+
+# Bump when scale_image changes its output for the same input
+IMAGE_VARIANT_VERSION = 1
+
+
+def get_freshness(headers, now=None):
+    """Seconds a response stays fresh, from Cache-Control or Expires (DEFAULT_FRESH_SECONDS without either)"""
+    now = now or time.time()
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-cache" in cache_control or "no-store" in cache_control:
+        return 0.0
+    max_age = re.search(r"(?:^|[,\s])max-age=(\d+)", cache_control)
+    if max_age:
+        return float(max_age.group(1))
+    if headers.get("Expires"):
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(headers["Expires"]).timestamp() - now)
+        except (TypeError, ValueError):
+            # An invalid Expires means already expired
+            return 0.0
+    return DEFAULT_FRESH_SECONDS
+
+
+class ImageCache:
+    """
+    URL-keyed image cache with HTTP revalidation and a scaled variant cache.
+
+    Usage:
+        cache = ImageCache(".cache/images", max_bytes, variant_max_bytes)
+        cache.fetch(url, "panel.jpg", session=session)
+        cache.scale_images(["panel.jpg"], 0.5, "scaled/")
+    """
+
+    def __init__(self, directory, max_bytes, variant_max_bytes):
+        self.images = DiskCache(os.path.join(directory, "originals"), max_bytes, suffix=".img", name="image")
+        # A few hundred bytes per URL
+        self.urls = DiskCache(os.path.join(directory, "urls"), 16 * 1024 * 1024, suffix=".json")
+        self.variants = DiskCache(os.path.join(directory, "variants"), variant_max_bytes, suffix=".jpg", name="image_variant")
+
+    def fetch(self, url, output_file, session=None):
+        """
+        Write the image at url to output_file, from the cache when it is fresh or
+        revalidates, otherwise streamed from the server (and then cached).
+        """
+        url_key = stable_digest("image_url", url)
+        entry = self.urls.get_json(url_key)
+        cached_file = self.images.get(entry["digest"]) if entry else None
+        if cached_file and time.time() < entry["expires"] and self._copy(cached_file, output_file):
+            return output_file
+
+        headers = {}
+        if cached_file:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        trace = current_trace()
+        with trace.stage("image_download"), (session or requests).get(url, headers=headers, stream=True) as response:
+            if response.status_code == 304 and cached_file:
+                trace.count("image_revalidations")
+                # A 304 may extend the freshness
+                entry["expires"] = time.time() + get_freshness(response.headers)
+                if self._copy(cached_file, output_file):
+                    self.urls.put_json(url_key, entry)
+                    return output_file
+                # Evicted in the meantime; fetch it unconditionally
+                return self._fetch_uncached(url, url_key, output_file, session)
+            return self._store_response(response, url, url_key, output_file)
+
+    def _fetch_uncached(self, url, url_key, output_file, session=None):
+        with current_trace().stage("image_download"), (session or requests).get(url, stream=True) as response:
+            return self._store_response(response, url, url_key, output_file)
+
+    def _store_response(self, response, url, url_key, output_file):
+        """Stream a 200 response to output_file while hashing it, then cache it under its digest"""
+        if response.status_code != 200:
+            raise Exception(f"Failed to download image from {url}")
+        trace = current_trace()
+        digest = hashlib.sha256()
+        with open(output_file, "wb") as f:
+            for chunk in response.iter_content(chunk_size=1 << 16):
+                f.write(chunk)
+                digest.update(chunk)
+                trace.count("bytes_downloaded", len(chunk))
+        trace.count("images_downloaded")
+
+        digest = digest.hexdigest()
+        self.images.put_file(digest, output_file)
+        self.urls.put_json(url_key, {
+            "digest": digest,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "expires": time.time() + get_freshness(response.headers),
+        })
+        return output_file
+
+    def scale_images(self, image_files, scale, output_dir):
+        """video.images.scale_images, reusing cached variants of the same content and scale"""
+        if scale >= 1.0:
+            return list(image_files)
+
+        scaled_files = []
+        for i, image_file in enumerate(image_files):
+            scaled_file = os.path.join(output_dir, f"scaled_{i:03d}.jpg")
+            key = stable_digest("image_variant", IMAGE_VARIANT_VERSION, file_digest(image_file), round(scale, 6))
+            cached_file = self.variants.get(key)
+            if not (cached_file and self._copy(cached_file, scaled_file)):
+                scale_image(image_file, scale, scaled_file)
+                self.variants.put_file(key, scaled_file)
+            scaled_files.append(scaled_file)
+        return scaled_files
+
+    @staticmethod
+    def _copy(cached_file, output_file):
+        """Copy a cache entry out (callers own and delete their files); False if it was evicted meanwhile"""
+        try:
+            shutil.copyfile(cached_file, output_file)
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+from PIL import Image, ImageOps
+
+# EXIF orientations that rotate the image by 90 degrees
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+EXIF_ORIENTATION_TAG = 0x0112
+
+
+def get_image_size(image_file):
+    """
+    (width, height) of an image as it will be displayed, read from the header.
+
+    The pixels are not decoded. EXIF rotation is taken into account, the
+    same way cv2.imread applies it.
+    """
+    try:
+        with Image.open(image_file) as image:
+            width, height = image.size
+            orientation = image.getexif().get(EXIF_ORIENTATION_TAG, 1)
+    except Exception as e:
+        raise ValueError(f"Could not read image file: {image_file} ({e})")
+    if orientation in TRANSPOSED_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
+def load_scaled_image(image_file, scale=1.0):
+    """
+    Decode an image as a BGR array, downscaled by scale.
+
+    JPEGs are decoded straight at a reduced DCT size when that is enough for
+    the target, so a large source never has to be held at full resolution.
+    """
+    with Image.open(image_file) as image:
+        stored_width, stored_height = image.size
+        transposed = image.getexif().get(EXIF_ORIENTATION_TAG, 1) in TRANSPOSED_ORIENTATIONS
+        stored_size = (max(2, int(round(stored_width * scale))), max(2, int(round(stored_height * scale))))
+        if scale < 1.0:
+            image.draft("RGB", stored_size)
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        size = stored_size[::-1] if transposed else stored_size
+        if image.size != size:
+            image = image.resize(size, Image.LANCZOS)
+        return np.asarray(image)[:, :, ::-1]
+
+
+def scale_image(image_file, scale, output_file):
+    """Write a copy of an image downscaled by scale (see load_scaled_image) as a JPEG"""
+    rgb = load_scaled_image(image_file, scale)[:, :, ::-1]
+    Image.fromarray(rgb).save(output_file, format="JPEG", quality=92)
+    return output_file
+
+
+def scale_images(image_files, scale, output_dir):
+    """
+    Write copies of the images downscaled by scale into output_dir.
+
+    Images are processed one at a time, so memory use does not depend on how
+    many there are. Every renderer sizes its canvas from the images, so
+    scaling them once up front makes all render paths produce the smaller
+    resolution.
+    """
+    if scale >= 1.0:
+        return list(image_files)
+
+    scaled_files = []
+    for i, image_file in enumerate(image_files):
+        scaled_files.append(scale_image(image_file, scale, os.path.join(output_dir, f"scaled_{i:03d}.jpg")))
+    return scaled_files
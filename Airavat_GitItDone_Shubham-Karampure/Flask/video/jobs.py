@@ -0,0 +1,255 @@
+"""
+Background render jobs backed by a local SQLite store.
+
+The web handler only inserts a row and returns its id; a JobQueue in each
+server process claims queued rows and runs them on a bounded number of
+threads. Because the queue lives in SQLite, jobs that were queued (or were
+running when the process died) are picked up again after a restart, and
+several Flask/gunicorn workers can share one database file.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+# Share of the overall progress covered by each stage, in order
+STAGES = [
+    ("queued", 0),
+    ("acquiring", 10),
+    ("aligning", 10),
+    ("rendering", 70),
+    ("uploading", 10),
+]
+
+DEFAULT_DB_PATH = os.environ.get("VIDEO_JOB_DB", os.path.join(".cache", "video_jobs.sqlite3"))
+DEFAULT_MAX_WORKERS = int(os.environ.get("VIDEO_JOB_WORKERS", "2"))
+
+# A running job whose owner has not refreshed its heartbeat for this long is
+# assumed lost (process killed or restarted) and is queued again
+STALE_SECONDS = float(os.environ.get("VIDEO_JOB_STALE_SECONDS", "60"))
+MAX_ATTEMPTS = 3
+
+
+def stage_percent(stage, fraction=None):
+    """Overall percent complete when `fraction` (0-1) of `stage` is done"""
+    done = 0
+    for name, weight in STAGES:
+        if name == stage:
+            return min(100.0, done + weight * min(max(fraction or 0.0, 0.0), 1.0))
+        done += weight
+    return 100.0
+
+
+class JobStore:
+    """SQLite table of jobs; safe to share between threads and processes"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    params TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    owner TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    heartbeat_at REAL
+                )
+            """)
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def _connect(self):
+        # One connection per thread; autocommit so claims can use BEGIN IMMEDIATE
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def create(self, params, job_id=None):
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO jobs (id, status, stage, params, created_at, updated_at) VALUES (?, 'queued', 'queued', ?, ?, ?)",
+            (job_id, json.dumps(params), now, now)
+        )
+        return job_id
+
+    def get(self, job_id):
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def claim_next(self, owner):
+        """Mark the oldest queued job as running for owner and return it, or None"""
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1").fetchone()
+            if row is None:
+                db.execute("COMMIT")
+                return None
+            now = time.time()
+            db.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, attempts = attempts + 1, updated_at = ?, heartbeat_at = ? WHERE id = ?",
+                (owner, now, now, row["id"])
+            )
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return self.get(row["id"])
+
+    def update_progress(self, job_id, stage, progress):
+        now = time.time()
+        self._connect().execute(
+            "UPDATE jobs SET stage = ?, progress = ?, updated_at = ?, heartbeat_at = ? WHERE id = ? AND status = 'running'",
+            (stage, progress, now, now, job_id)
+        )
+
+    def heartbeat(self, owner):
+        self._connect().execute(
+            "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = 'running'",
+            (time.time(), owner)
+        )
+
+    def finish(self, job_id, result):
+        self._connect().execute(
+            "UPDATE jobs SET status = 'done', stage = 'done', progress = 100, result = ?, updated_at = ? WHERE id = ?",
+            (json.dumps(result), time.time(), job_id)
+        )
+
+    def fail(self, job_id, error):
+        self._connect().execute(
+            "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+            (error, time.time(), job_id)
+        )
+
+    def requeue_stale(self, stale_seconds=STALE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        """Queue lost running jobs again (or fail them after max_attempts); returns how many"""
+        db = self._connect()
+        cutoff = time.time() - stale_seconds
+        now = time.time()
+        db.execute(
+            "UPDATE jobs SET status = 'failed', error = 'Render was interrupted too many times', updated_at = ? "
+            "WHERE status = 'running' AND heartbeat_at < ? AND attempts >= ?",
+            (now, cutoff, max_attempts)
+        )
+        cursor = db.execute(
+            "UPDATE jobs SET status = 'queued', stage = 'queued', progress = 0, owner = NULL, updated_at = ? "
+            "WHERE status = 'running' AND heartbeat_at < ?",
+            (now, cutoff)
+        )
+        return cursor.rowcount
+
+
+class JobQueue:
+    """
+    Runs queued jobs from a JobStore on at most max_workers threads.
+
+    runner(params, progress) does the work and returns a JSON-serializable
+    result; it reports with progress(stage, fraction), where stage is one of
+    STAGES and fraction (0-1, optional) is how much of that stage is done.
+
+    Usage:
+        queue = JobQueue(JobStore(), run_job, max_workers=2).start()
+        job_id = queue.submit({"texts": [...], ...})
+    """
+
+    def __init__(self, store, runner, max_workers=DEFAULT_MAX_WORKERS, poll_interval=2.0):
+        self.store = store
+        self.runner = runner
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._wakeup = threading.Event()
+        self._started = False
+
+    def start(self):
+        if not self._started:
+            self._started = True
+            threading.Thread(target=self._dispatch_loop, name="video-job-dispatcher", daemon=True).start()
+        return self
+
+    def submit(self, params, job_id=None):
+        job_id = self.store.create(params, job_id)
+        self._wakeup.set()
+        return job_id
+
+    def _dispatch_loop(self):
+        last_maintenance = 0.0
+        while True:
+            if time.monotonic() - last_maintenance >= self.poll_interval:
+                last_maintenance = time.monotonic()
+                try:
+                    self.store.heartbeat(self.owner)
+                    requeued = self.store.requeue_stale()
+                    if requeued:
+                        print(f"Requeued {requeued} interrupted video job(s)")
+                except Exception as e:
+                    print(f"Video job maintenance failed: {e}")
+
+            # Wait for a free worker before claiming, so claimed jobs start immediately
+            if not self._slots.acquire(timeout=self.poll_interval):
+                continue
+            try:
+                job = self.store.claim_next(self.owner)
+            except Exception as e:
+                print(f"Could not claim a video job: {e}")
+                job = None
+            if job is None:
+                self._slots.release()
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            threading.Thread(target=self._run, args=(job,), name=f"video-job-{job['id'][:8]}", daemon=True).start()
+
+    def _run(self, job):
+        job_id = job["id"]
+        last = {"stage": None, "percent": -1.0}
+
+        def progress(stage, fraction=None):
+            percent = round(stage_percent(stage, fraction), 1)
+            # Only write when something visible changed
+            if stage == last["stage"] and percent - last["percent"] < 1.0:
+                return
+            last["stage"], last["percent"] = stage, percent
+            try:
+                self.store.update_progress(job_id, stage, percent)
+            except Exception as e:
+                print(f"Could not record progress for job {job_id}: {e}")
+
+        try:
+            print(f"Starting video job {job_id} (attempt {job['attempts']})")
+            result = self.runner(job["params"], progress)
+            self.store.finish(job_id, result)
+            print(f"Video job {job_id} finished")
+        except Exception as e:
+            print(f"Video job {job_id} failed: {e}")
+            print(traceback.format_exc())
+            self.store.fail(job_id, str(e))
+        finally:
+            self._slots.release()
+            self._wakeup.set()
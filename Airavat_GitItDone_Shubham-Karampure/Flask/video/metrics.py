@@ -0,0 +1,215 @@
+"""
+Stage timers and counters for video renders.
+
+A RenderTrace collects, for one render, how long each stage took (image
+download, TTS, alignment, rendering, encodes, upload, ...) and counters such
+as frames rendered, bytes downloaded, TTS characters and cache hits. The
+pipeline records into whichever trace is active (see activate and
+current_trace), so functions deep in video_gen do not need a trace argument.
+Finished traces are written as JSON files and added to the process-wide
+render_metrics, which the server exposes in Prometheus text format.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+DEFAULT_TRACE_DIR = os.environ.get("VIDEO_TRACE_DIR", os.path.join(".cache", "traces"))
+
+_current_trace = contextvars.ContextVar("video_render_trace", default=None)
+
+
+class RenderTrace:
+    """
+    Timings and counters of one render; safe to record into from several threads.
+
+    Usage:
+        trace = RenderTrace()
+        with activate(trace):
+            with current_trace().stage("tts"):
+                ...
+            current_trace().count("tts_characters", len(text))
+        trace.finish()
+    """
+
+    def __init__(self, trace_id=None, trace_dir=DEFAULT_TRACE_DIR):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.trace_dir = trace_dir
+        self.started_at = time.time()
+        self.duration = None
+        self.status = "running"
+        self.error = None
+        self.spans = []
+        self.counters = {}
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as one span of stage name"""
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add_span(name, start - self._start, time.perf_counter() - start)
+
+    def add_span(self, name, start, duration):
+        """Record a span of stage name starting start seconds into the render"""
+        with self._lock:
+            self.spans.append({
+                "stage": name,
+                "start": round(start, 6),
+                "duration": round(duration, 6),
+                "thread": threading.current_thread().name,
+            })
+
+    def count(self, name, value=1):
+        """Add value to counter name"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, trace_dict):
+        """Add the spans and counters of a trace recorded elsewhere (e.g. in a worker process)"""
+        offset = trace_dict["started_at"] - self.started_at
+        with self._lock:
+            for span in trace_dict["spans"]:
+                self.spans.append(dict(span, start=round(span["start"] + offset, 6)))
+            for name, value in trace_dict["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def stage_totals(self):
+        """{stage: {"seconds", "calls"}}; spans on parallel threads each count in full"""
+        totals = {}
+        with self._lock:
+            for span in self.spans:
+                total = totals.setdefault(span["stage"], {"seconds": 0.0, "calls": 0})
+                total["seconds"] += span["duration"]
+                total["calls"] += 1
+        for total in totals.values():
+            total["seconds"] = round(total["seconds"], 3)
+        return totals
+
+    def summary(self):
+        """Stage totals, counters and derived rates, without the individual spans"""
+        stages = self.stage_totals()
+        with self._lock:
+            counters = dict(self.counters)
+        render_seconds = stages.get("render", {}).get("seconds")
+        return {
+            "trace_id": self.trace_id,
+            "status": self.status,
+            "duration": round(self.duration if self.duration is not None else time.perf_counter() - self._start, 3),
+            "stages": stages,
+            "counters": counters,
+            # Frames per second of "render" time, summed over parallel workers
+            "render_fps": round(counters["frames"] / render_seconds, 1) if counters.get("frames") and render_seconds else None,
+        }
+
+    def to_dict(self):
+        trace = self.summary()
+        trace.update(started_at=self.started_at, error=self.error)
+        with self._lock:
+            trace["spans"] = sorted(self.spans, key=lambda span: span["start"])
+        return trace
+
+    def finish(self, error=None):
+        """
+        Close the trace: record its duration and status, add it to render_metrics
+        and write it to <trace_dir>/<trace_id>.json. Returns the summary.
+        """
+        self.duration = time.perf_counter() - self._start
+        self.status = "failed" if error else "done"
+        self.error = str(error) if error else None
+        render_metrics.observe(self)
+        stages = ", ".join(f"{name} {total['seconds']:.2f}s" for name, total in self.stage_totals().items())
+        print(f"Render {self.trace_id} {self.status} in {self.duration:.2f}s ({stages})")
+        if self.trace_dir:
+            try:
+                self.write(os.path.join(self.trace_dir, f"{self.trace_id}.json"))
+            except OSError as e:
+                print(f"Could not write render trace {self.trace_id}: {e}")
+        return self.summary()
+
+    def write(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+
+class _NullTrace:
+    """Stand-in returned by current_trace() outside a render; records nothing"""
+
+    @contextmanager
+    def stage(self, name):
+        yield self
+
+    def add_span(self, name, start, duration):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+    def merge(self, trace_dict):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+def current_trace():
+    """The RenderTrace active in this context, or a no-op trace"""
+    return _current_trace.get() or NULL_TRACE
+
+
+@contextmanager
+def activate(trace):
+    """Make trace the current_trace() for the enclosed block"""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+class RenderMetrics:
+    """Process-wide totals over finished traces, for the metrics endpoint"""
+
+    def __init__(self):
+        self.renders = {}
+        self.render_seconds = 0.0
+        self.stage_seconds = {}
+        self.stage_calls = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, trace):
+        stages = trace.stage_totals()
+        with self._lock:
+            self.renders[trace.status] = self.renders.get(trace.status, 0) + 1
+            self.render_seconds += trace.duration or 0.0
+            for name, total in stages.items():
+                self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + total["seconds"]
+                self.stage_calls[name] = self.stage_calls.get(name, 0) + total["calls"]
+            for name, value in trace.counters.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def prometheus_text(self):
+        """Totals in the Prometheus text exposition format"""
+        with self._lock:
+            lines = ["# TYPE video_renders_total counter"]
+            lines += [f'video_renders_total{{status="{status}"}} {count}' for status, count in sorted(self.renders.items())]
+            lines += ["# TYPE video_render_seconds_total counter", f"video_render_seconds_total {self.render_seconds:.3f}"]
+            lines.append("# TYPE video_stage_seconds_total counter")
+            lines += [f'video_stage_seconds_total{{stage="{name}"}} {seconds:.3f}' for name, seconds in sorted(self.stage_seconds.items())]
+            lines.append("# TYPE video_stage_calls_total counter")
+            lines += [f'video_stage_calls_total{{stage="{name}"}} {calls}' for name, calls in sorted(self.stage_calls.items())]
+            for name, value in sorted(self.counters.items()):
+                lines += [f"# TYPE video_{name}_total counter", f"video_{name}_total {value}"]
+        return "\n".join(lines) + "\n"
+
+
+render_metrics = RenderMetrics()
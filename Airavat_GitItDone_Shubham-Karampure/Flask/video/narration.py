@@ -0,0 +1,106 @@
+"""
+Segment boundaries of a narration synthesized in one TTS request.
+
+The segment texts are joined with an explicit pause (SEGMENT_BREAK) and
+synthesized together (see video_gen.get_narrations_batched). The audio is
+then cut back into one clip per segment, spanning just the segment's speech
+plus SEGMENT_EDGE_PAD on either side, so the pauses between segments are
+dropped and a clip paces like one synthesized on its own. The spans come
+from the per-character timings the provider returns (get_alignment_spans)
+or, when it returns none, from the longest silences in the audio
+(get_silence_spans).
+"""
+import os
+
+# ElevenLabs break tag between segments; long enough to stand out from the
+# pauses inside a segment when only silence detection is available
+SEGMENT_BREAK = os.environ.get("TTS_SEGMENT_BREAK", ' <break time="1.0s" /> ')
+
+# Silence kept before a segment's first and after its last sound, in seconds;
+# about the lead-in and tail of a clip synthesized per segment
+SEGMENT_EDGE_PAD = float(os.environ.get("TTS_SEGMENT_EDGE_PAD", "0.1"))
+
+
+def join_narration(texts):
+    """One request text for all segments, with SEGMENT_BREAK between them"""
+    return SEGMENT_BREAK.join(text.strip() for text in texts)
+
+
+def pad_spans(spans, duration=None, pad=SEGMENT_EDGE_PAD):
+    """
+    Widen speech spans by pad on both sides, without overlapping a neighbour
+    (two spans never reach past the middle of the gap between them) or
+    leaving the audio. An end of None stays None (to the end of the audio).
+    """
+    padded = []
+    for i, (start, end) in enumerate(spans):
+        lower = (spans[i - 1][1] + start) / 2 if i > 0 else 0.0
+        start = max(lower, start - pad)
+        if end is not None:
+            upper = (end + spans[i + 1][0]) / 2 if i + 1 < len(spans) else duration
+            end = end + pad if upper is None else min(upper, end + pad)
+        padded.append((start, end))
+    return padded
+
+
+def get_alignment_spans(alignment, texts, pad=SEGMENT_EDGE_PAD):
+    """
+    (start, end) in seconds of every segment's speech from a character alignment.
+
+    alignment is ElevenLabs' {"characters", "character_start_times_seconds",
+    "character_end_times_seconds"}. Each segment text is located in the
+    aligned characters in order; its span runs from the start of its first
+    character to the end of its last, widened by pad (see pad_spans). Returns
+    None when a segment cannot be found (e.g. the provider normalized it).
+    """
+    try:
+        characters = alignment["characters"]
+        starts = alignment["character_start_times_seconds"]
+        ends = alignment["character_end_times_seconds"]
+    except (KeyError, TypeError):
+        return None
+
+    # Entries are usually single characters; map every character to its entry
+    spoken = ""
+    entry_of = []
+    for i, character in enumerate(characters):
+        spoken += character
+        entry_of += [i] * len(character)
+
+    spans = []
+    cursor = 0
+    for text in texts:
+        text = text.strip()
+        position = spoken.find(text, cursor) if text else -1
+        if position < 0:
+            return None
+        spans.append((entry_of[position], entry_of[position + len(text) - 1]))
+        cursor = position + len(text)
+
+    return pad_spans([(starts[first], ends[last]) for first, last in spans], pad=pad)
+
+
+def get_silence_spans(silences, duration, count, pad=SEGMENT_EDGE_PAD):
+    """
+    (start, end) of count segments separated by the count - 1 longest silences.
+
+    silences are (start, end) pairs from video.audio.detect_silences. Each
+    segment runs from the end of the silence before it to the start of the
+    one after it, widened by pad (see pad_spans); silence at the very start
+    or end of the audio is trimmed the same way but is not a boundary.
+    Returns None when there are too few silences.
+    """
+    inner = []
+    start_of_speech, end_of_speech = 0.0, duration
+    for start, end in silences:
+        if start <= 0.0 and end is not None:
+            start_of_speech = end
+        elif end is None or (duration is not None and end >= duration):
+            end_of_speech = start
+        else:
+            inner.append((start, end))
+    if len(inner) < count - 1:
+        return None
+    longest = sorted(sorted(inner, key=lambda silence: silence[1] - silence[0], reverse=True)[:count - 1])
+    bounds = [start_of_speech] + [edge for silence in longest for edge in silence] + [end_of_speech]
+    return pad_spans(list(zip(bounds[::2], bounds[1::2])), duration, pad)
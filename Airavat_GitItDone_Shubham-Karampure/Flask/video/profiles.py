@@ -0,0 +1,93 @@
+import os
+from collections import namedtuple
+
+
+class RenderProfile(namedtuple("RenderProfile", ["name", "max_dimension", "fps", "preset", "crf", "audio_bitrate"])):
+    """
+    Output settings for one kind of render.
+
+    max_dimension caps the longer side of the canvas (None keeps the source
+    resolution up to MAX_IMAGE_DIMENSION); fps, preset, crf and audio_bitrate
+    go to the x264/AAC encode.
+    """
+    __slots__ = ()
+
+
+RENDER_PROFILES = {
+    # Timing checks: small frames, few of them, fastest x264 preset
+    "draft": RenderProfile("draft", max_dimension=640, fps=12, preset="ultrafast", crf=32, audio_bitrate="96k"),
+    # What every render used before profiles existed
+    "standard": RenderProfile("standard", max_dimension=None, fps=24, preset="medium", crf=23, audio_bitrate="192k"),
+    # Delivery: quality-targeted CRF with a slower preset for better compression
+    "final": RenderProfile("final", max_dimension=None, fps=24, preset="slow", crf=18, audio_bitrate="192k"),
+}
+
+DEFAULT_PROFILE = os.environ.get("VIDEO_RENDER_PROFILE", "standard")
+
+# Longest side any render uses, whatever the source images are; profiles
+# without their own max_dimension are capped here
+MAX_IMAGE_DIMENSION = int(os.environ.get("VIDEO_MAX_IMAGE_DIMENSION", "1920"))
+
+
+def get_render_profile(profile=None):
+    """Resolve a profile name (default: VIDEO_RENDER_PROFILE, else "standard") or pass a RenderProfile through"""
+    if isinstance(profile, RenderProfile):
+        return profile
+    name = profile or DEFAULT_PROFILE
+    if name not in RENDER_PROFILES:
+        raise ValueError(f"Unknown render profile '{name}', expected one of: {', '.join(RENDER_PROFILES)}")
+    return RENDER_PROFILES[name]
+
+
+def encode_options(profile):
+    """Keyword arguments for the video.encoder functions"""
+    return {"preset": profile.preset, "crf": profile.crf, "audio_bitrate": profile.audio_bitrate}
+
+
+def get_profile_scale(frame_size, profile):
+    """Factor (<= 1) that fits a (width, height) canvas into the profile's max_dimension"""
+    max_dimension = profile.max_dimension or MAX_IMAGE_DIMENSION
+    return min(1.0, max_dimension / max(frame_size))
+
+
+# Output aspect ratios one render can produce side by side, as (width, height) ratios
+OUTPUT_FORMATS = {
+    "16:9": (16, 9),  # Web comic page embeds
+    "9:16": (9, 16),  # Shorts / reels
+    "1:1": (1, 1),  # Square feeds
+}
+
+# How a still is fitted to an output aspect ratio that differs from it:
+# "pad" letterboxes it on black (nothing is cut off), "crop" fills the frame
+FORMAT_FIT = os.environ.get("VIDEO_FORMAT_FIT", "pad")
+
+
+def get_output_formats(output_formats):
+    """Validate a list of OUTPUT_FORMATS names; duplicates are dropped, order is kept"""
+    output_formats = list(dict.fromkeys(output_formats or []))
+    for output_format in output_formats:
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}', expected one of: {', '.join(OUTPUT_FORMATS)}")
+    return output_formats
+
+
+def get_format_size(frame_size, output_format):
+    """
+    (width, height) of output_format for a render whose canvas is frame_size.
+
+    The shorter side of the output matches the shorter side of the canvas, so
+    every format keeps the profile's resolution; both sides are even for yuv420p.
+    """
+    ratio_width, ratio_height = OUTPUT_FORMATS[output_format]
+    short_side = min(frame_size)
+    if ratio_width >= ratio_height:
+        width, height = short_side * ratio_width / ratio_height, short_side
+    else:
+        width, height = short_side, short_side * ratio_height / ratio_width
+    return int(round(width / 2)) * 2, int(round(height / 2)) * 2
+
+
+def get_format_output_path(output_path, output_format):
+    """output.mp4 -> output_9x16.mp4"""
+    root, ext = os.path.splitext(output_path)
+    return f"{root}_{output_format.replace(':', 'x')}{ext or '.mp4'}"
@@ -0,0 +1,167 @@
+"""
+HLS packaging of reels while they render.
+
+An HlsPackager cuts encoded chunks (one per chapter, see
+video_gen.render_segments_parallel) into HLS segments by stream copy and
+keeps an EVENT playlist next to the output video that grows chunk by chunk,
+so a player can start on the first chapters while later ones still render.
+Segments are CMAF fragmented MP4 by default, or MPEG-TS.
+"""
+import math
+import os
+import shutil
+import subprocess
+from collections import namedtuple
+
+
+class HlsSettings(namedtuple("HlsSettings", ["segment_duration", "keyframe_interval", "segment_type"])):
+    """
+    segment_duration is the target length of a segment in seconds;
+    keyframe_interval (seconds) is forced on the chunk encodes, and since
+    segments can only start on a keyframe it bounds how far one can run past
+    the target. segment_type is "fmp4" (CMAF) or "mpegts".
+    """
+    __slots__ = ()
+
+
+DEFAULT_HLS_SETTINGS = HlsSettings(
+    segment_duration=float(os.environ.get("VIDEO_HLS_SEGMENT_SECONDS", "4")),
+    keyframe_interval=float(os.environ.get("VIDEO_HLS_KEYFRAME_INTERVAL", "2")),
+    segment_type=os.environ.get("VIDEO_HLS_SEGMENT_TYPE", "fmp4"),
+)
+
+HLS_SEGMENT_TYPES = {"fmp4": ".m4s", "mpegts": ".ts"}
+
+PLAYLIST_NAME = "index.m3u8"
+
+
+def get_hls_settings(hls=None):
+    """
+    Resolve the hls option of generate_video to HlsSettings, or None when off.
+
+    None follows VIDEO_HLS (default off), True uses DEFAULT_HLS_SETTINGS and
+    a dict overrides some of its fields.
+    """
+    if hls is None:
+        hls = os.environ.get("VIDEO_HLS", "0").lower() not in ("0", "false", "no", "off")
+    if not hls:
+        return None
+    if isinstance(hls, HlsSettings):
+        settings = hls
+    elif isinstance(hls, dict):
+        unknown = set(hls) - set(HlsSettings._fields)
+        if unknown:
+            raise ValueError(f"Unknown HLS settings: {', '.join(sorted(unknown))}")
+        settings = DEFAULT_HLS_SETTINGS._replace(**hls)
+    else:
+        settings = DEFAULT_HLS_SETTINGS
+
+    if settings.segment_type not in HLS_SEGMENT_TYPES:
+        raise ValueError(f"Unknown HLS segment type '{settings.segment_type}', expected one of: {', '.join(HLS_SEGMENT_TYPES)}")
+    try:
+        segment_duration, keyframe_interval = float(settings.segment_duration), float(settings.keyframe_interval)
+    except (TypeError, ValueError):
+        raise ValueError("HLS segment_duration and keyframe_interval must be numbers")
+    if not 0 < keyframe_interval <= segment_duration:
+        raise ValueError("HLS keyframe_interval must be positive and no longer than segment_duration")
+    return settings._replace(segment_duration=segment_duration, keyframe_interval=keyframe_interval)
+
+
+def get_hls_dir(output_path):
+    """output.mp4 -> output_hls (the playlist is output_hls/index.m3u8)"""
+    return os.path.splitext(output_path)[0] + "_hls"
+
+
+class HlsPackager:
+    """
+    Build an HLS stream from encoded chunks as they become available.
+
+    Chunks must be added in playback order. Each is segmented by stream copy
+    (no re-encode) and its segments appended to the playlist after an
+    EXT-X-DISCONTINUITY, since every chunk starts its timestamps at zero. The
+    playlist is written atomically after every chunk and first appears once
+    the first chunk is added; finish() marks it complete.
+
+    Usage:
+        packager = HlsPackager(get_hls_dir(output_path), get_hls_settings(True))
+        for chunk in chunks:
+            packager.add_chunk(chunk)
+        packager.finish()
+    """
+
+    def __init__(self, directory, settings=DEFAULT_HLS_SETTINGS):
+        self.directory = directory
+        self.settings = settings
+        self.playlist_path = os.path.join(directory, PLAYLIST_NAME)
+        self.entries = []
+        self.chunks = 0
+        # Fixed before the first publish, since an EVENT playlist may not change it
+        # (RFC 8216): a segment runs at most one keyframe interval past the target
+        self.target_duration = math.ceil(settings.segment_duration + settings.keyframe_interval)
+        # Segments of an earlier render of the same output would be mixed in
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+    def add_chunk(self, chunk_file):
+        """Segment chunk_file, append its segments and republish the playlist"""
+        prefix = f"chunk{self.chunks:03d}"
+        chunk_playlist = os.path.join(self.directory, prefix + ".m3u8")
+        command = [
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error",
+            "-i", chunk_file,
+            "-c", "copy",
+            "-f", "hls",
+            "-hls_time", str(self.settings.segment_duration),
+            "-hls_playlist_type", "vod",
+            "-hls_segment_type", self.settings.segment_type,
+            "-hls_segment_filename", os.path.join(self.directory, f"{prefix}_%03d{HLS_SEGMENT_TYPES[self.settings.segment_type]}"),
+        ]
+        if self.settings.segment_type == "fmp4":
+            command += ["-hls_fmp4_init_filename", f"{prefix}_init.mp4"]
+        command.append(chunk_playlist)
+        result = subprocess.run(command, capture_output=True)
+        if result.returncode != 0:
+            raise Exception(f"ffmpeg HLS segmenting failed for {chunk_file}: {result.stderr.decode(errors='replace').strip()}")
+
+        with open(chunk_playlist, encoding="utf-8") as f:
+            lines = [line.strip() for line in f if line.strip()]
+        os.remove(chunk_playlist)
+
+        entries = ["#EXT-X-DISCONTINUITY"] if self.chunks else []
+        for line in lines:
+            if line.startswith("#EXT-X-MAP:") or line.startswith("#EXTINF:"):
+                entries.append(line)
+                if line.startswith("#EXTINF:"):
+                    duration = float(line[len("#EXTINF:"):].split(",", 1)[0])
+                    if round(duration) > self.target_duration:
+                        raise Exception(f"HLS segment of {duration:.2f}s in {chunk_file} exceeds the target duration of "
+                                        f"{self.target_duration}s; was it encoded with keyframe_interval={self.settings.keyframe_interval}?")
+            elif not line.startswith("#"):
+                # Segment URIs relative to the playlist
+                entries.append(os.path.basename(line))
+        self.entries += entries
+        self.chunks += 1
+        self.publish()
+
+    def finish(self):
+        """Publish the playlist with EXT-X-ENDLIST, so players know no more segments follow"""
+        self.publish(ended=True)
+        return self.playlist_path
+
+    def publish(self, ended=False):
+        lines = [
+            "#EXTM3U",
+            f"#EXT-X-VERSION:{7 if self.settings.segment_type == 'fmp4' else 3}",
+            f"#EXT-X-TARGETDURATION:{self.target_duration}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+            "#EXT-X-INDEPENDENT-SEGMENTS",
+            *self.entries,
+        ]
+        if ended:
+            lines.append("#EXT-X-ENDLIST")
+        # Players poll the playlist; they must never see a partly written one
+        temp_path = self.playlist_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temp_path, self.playlist_path)
@@ -0,0 +1,98 @@
+import math
+import numpy as np
+
+WINDOW_SIZE = 8  # Show 8 words at a time
+
+
+class WordTimeline:
+    """
+    Array-backed word timeline used to drive the captions.
+
+    Word start/end times live in NumPy arrays so the current word for any
+    time (or for every frame at once) is a binary search instead of a scan
+    over the list of word dicts. Words are expected in spoken order, which is
+    how Whisper and create_words_with_timestamps return them.
+    """
+
+    def __init__(self, words_with_timestamps, window_size=WINDOW_SIZE):
+        self.words = words_with_timestamps
+        self.window_size = window_size
+        self.starts = np.array([word["start"] for word in words_with_timestamps], dtype=np.float64)
+        self.ends = np.array([word["end"] for word in words_with_timestamps], dtype=np.float64)
+        # Running maximum of the end times: the first word still being spoken
+        # at time t is the first index where this reaches t.
+        self._max_ends = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+    def __len__(self):
+        return len(self.words)
+
+    def word_indices_at(self, times):
+        """
+        Current word index for each time in an array, -1 where no word is spoken.
+
+        Matches the original linear scan: the first word with start <= t <= end.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        if not len(self.words):
+            return np.full(times.shape, -1, dtype=np.int64)
+
+        last_started = np.searchsorted(self.starts, times, side="right") - 1
+        first_unfinished = np.searchsorted(self._max_ends, times, side="left")
+        return np.where(first_unfinished <= last_started, first_unfinished, -1)
+
+    def word_at(self, current_time):
+        """Current word index at current_time, or None"""
+        idx = int(self.word_indices_at(current_time))
+        return idx if idx >= 0 else None
+
+    def frame_word_map(self, fps, frame_count=None):
+        """
+        Precompute the current word index of every frame (-1 for none).
+
+        Frame times are frame_idx / fps, exactly as add_dynamic_subtitles
+        computes them. Frames past the returned array have no current word.
+        """
+        if frame_count is None:
+            last_end = float(self.ends.max()) if len(self.ends) else 0.0
+            frame_count = math.floor(last_end * fps) + 2
+        return self.word_indices_at(np.arange(frame_count) / fps)
+
+    def window(self, current_word_idx):
+        """Return (window_start, window_end) of the words shown around the current word"""
+        window_start = max(0, current_word_idx - self.window_size // 2)
+        window_end = min(len(self.words), window_start + self.window_size)
+        return window_start, window_end
+
+    def caption_events(self, fps, segment_start_times=None):
+        """
+        Split the frame timeline into intervals with an unchanging caption state.
+
+        A frame's state is (segment index, current word index). Since every segment
+        is a still image, all frames inside one interval look identical once the
+        caption is drawn, so the caption only has to be rendered once per interval.
+
+        Returns a list of (start_frame, end_frame, current_word_idx, segment_idx)
+        tuples sorted by start_frame; end_frame is exclusive and the last interval
+        ends at infinity. current_word_idx is None where no word is spoken.
+        """
+        segment_start_times = segment_start_times or [0.0]
+
+        # Cover every word and every segment start, plus one trailing frame
+        frame_word = self.frame_word_map(fps)
+        last_segment_frame = math.floor(max(segment_start_times) * fps) + 2
+        if last_segment_frame > len(frame_word):
+            frame_word = np.concatenate([frame_word, np.full(last_segment_frame - len(frame_word), -1)])
+
+        frame_times = np.arange(len(frame_word)) / fps
+        frame_segment = np.searchsorted(np.asarray(segment_start_times, dtype=np.float64), frame_times, side="right") - 1
+
+        changed = np.ones(len(frame_word), dtype=bool)
+        changed[1:] = (frame_word[1:] != frame_word[:-1]) | (frame_segment[1:] != frame_segment[:-1])
+        starts = np.flatnonzero(changed)
+
+        events = []
+        for i, start_frame in enumerate(starts):
+            end_frame = int(starts[i + 1]) if i + 1 < len(starts) else math.inf
+            word_idx = int(frame_word[start_frame])
+            events.append((int(start_frame), end_frame, word_idx if word_idx >= 0 else None, int(frame_segment[start_frame])))
+        return events
@@ -0,0 +1,123 @@
+"""
+Rendered videos in the uploads directory: content ETags and a disk cap.
+
+Videos are served with a strong ETag computed from their content (see
+content_etag), so players revalidate repeat views with If-None-Match
+instead of downloading again. The directory is kept under
+VIDEO_UPLOADS_MAX_MB by deleting the least recently served or written
+renders (see enforce_upload_limit); a render's HLS directory (see
+video.streaming) goes with its MP4.
+"""
+import os
+import shutil
+import threading
+import time
+
+from video.disk_cache import file_digest
+from video.streaming import get_hls_dir
+
+# 0 disables the cap
+UPLOADS_MAX_BYTES = int(os.environ.get("VIDEO_UPLOADS_MAX_MB", "5000")) * 1024 * 1024
+
+# path -> (size, mtime_ns, digest), so a file is hashed once per version
+_etags = {}
+_etags_lock = threading.Lock()
+
+
+def content_etag(path, stat=None):
+    """
+    Strong ETag of a file: the SHA-256 digest of its content.
+
+    Digests are remembered per path, size and mtime, so only the first
+    request for a new or rewritten file reads it.
+    """
+    stat = stat or os.stat(path)
+    version = (stat.st_size, stat.st_mtime_ns)
+    with _etags_lock:
+        cached = _etags.get(path)
+    if cached and cached[:2] == version:
+        return cached[2]
+    digest = file_digest(path)
+    with _etags_lock:
+        _etags[path] = version + (digest,)
+    return digest
+
+
+def touch_upload(path, stat=None):
+    """
+    Mark a video as just used for enforce_upload_limit.
+
+    Only the access time is set, explicitly (mounts with relatime or
+    noatime would not), so the mtime and with it the ETag stay unchanged.
+    """
+    stat = stat or os.stat(path)
+    try:
+        os.utime(path, ns=(time.time_ns(), stat.st_mtime_ns))
+    except OSError:
+        pass
+
+
+def _upload_entries(directory):
+    """(last used, size, paths) of every render: each MP4 with its HLS directory"""
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith(".mp4"):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        paths = [path]
+        size = stat.st_size
+        hls_dir = get_hls_dir(path)
+        if os.path.isdir(hls_dir):
+            paths.append(hls_dir)
+            for entry in os.scandir(hls_dir):
+                try:
+                    size += entry.stat().st_size
+                except OSError:
+                    continue
+        entries.append((max(stat.st_atime, stat.st_mtime), size, paths))
+    return entries
+
+
+def enforce_upload_limit(directory, max_bytes=UPLOADS_MAX_BYTES, keep=()):
+    """
+    Delete least recently used renders until directory holds at most max_bytes.
+
+    Evicts down to 90% of the cap, like DiskCache, so every render does not
+    trigger another scan. Files in keep (e.g. the render just finished) are
+    never deleted; other files (non-MP4) are left alone. Returns the paths removed.
+    """
+    if not max_bytes or not os.path.isdir(directory):
+        return []
+    keep = {os.path.abspath(path) for path in keep}
+    entries = sorted(_upload_entries(directory), key=lambda entry: entry[0])
+    total = sum(size for _, size, _ in entries)
+    if total <= max_bytes:
+        return []
+
+    removed = []
+    evicted = 0
+    target = max_bytes * 0.9
+    for _, size, paths in entries:
+        if total <= target:
+            break
+        if os.path.abspath(paths[0]) in keep:
+            continue
+        try:
+            os.remove(paths[0])
+        except OSError:
+            # Being served on Windows, or removed by another worker first
+            continue
+        for path in paths[1:]:
+            shutil.rmtree(path, ignore_errors=True)
+        with _etags_lock:
+            _etags.pop(paths[0], None)
+        total -= size
+        evicted += 1
+        removed.extend(paths)
+    if evicted:
+        print(f"Evicted {evicted} old render(s) from {directory} to stay under {max_bytes // (1024 * 1024)} MB")
+    return removed
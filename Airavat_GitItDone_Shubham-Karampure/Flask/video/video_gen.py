@@ -1,36 +1,81 @@
 import os
+import base64
 import requests
 import subprocess
 import tempfile
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import threading
 import time
 import gc
 import numpy as np
 import cv2
 import json
 from io import BytesIO
-from PIL import Image, ImageDraw, ImageFont
-from moviepy.editor import ImageClip, concatenate_videoclips, AudioFileClip, VideoFileClip
+from PIL import Image, ImageDraw
+from moviepy.editor import ImageClip, concatenate_videoclips, AudioFileClip
 from dotenv import load_dotenv
-import platform
-from pathlib import Path
 load_dotenv()
 
 # Add Whisper import
 import whisper
 
-def get_narration(text):
+from video.captions import CaptionCompositor
+from video.fonts import get_text_dimensions, load_font
+from video.timeline import WordTimeline
+from video.encoder import (
+    FFmpegFrameWriter, concat_segments, encode_slideshow, encode_slideshow_outputs, encode_still_segment, escape_filter_path, mux_audio
+)
+from video.audio import concat_audio, detect_silences, get_audio_duration as read_audio_duration, get_loudnorm_filter, split_audio
+from video.narration import SEGMENT_BREAK, SEGMENT_EDGE_PAD, get_alignment_spans, get_silence_spans, join_narration
+from video.http_client import DEFAULT_MAX_CONCURRENCY, create_session, map_concurrently
+from video.disk_cache import DiskCache, file_digest, stable_digest
+from video.alignment_server import get_server_address, request_alignment
+from video.workspace import JobWorkspace
+from video.metrics import RenderTrace, activate, current_trace
+from video.ass_captions import get_ass_font, write_caption_ass
+from video.profiles import (
+    FORMAT_FIT, encode_options as get_encode_options, get_format_output_path, get_format_size, get_output_formats,
+    get_profile_scale, get_render_profile
+)
+from video.images import get_image_size, scale_images
+from video.image_cache import ImageCache
+from video.streaming import HlsPackager, get_hls_dir, get_hls_settings
+
+# Overridable so tests can point TTS at a local stand-in server
+ELEVENLABS_API_URL = os.environ.get("ELEVENLABS_API_URL", "https://api.elevenlabs.io")
+ELEVENLABS_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"  # Your Eleven Labs voice ID
+ELEVENLABS_MODEL_ID = "eleven_monolingual_v1"  # Adding the model ID which is often required
+
+# Narration audio keyed on everything that affects the synthesized speech
+_tts_cache = DiskCache(
+    os.environ.get("TTS_CACHE_DIR", os.path.join(".cache", "tts")),
+    max_bytes=int(os.environ.get("TTS_CACHE_MAX_MB", "500")) * 1024 * 1024,
+    suffix=".mp3",
+    name="tts"
+)
+
+def get_narration(text, session=None, output_dir=None):
     """
     Obtain narration audio for the given text using Eleven Labs API.
+    
+    Pass a session from create_session() to reuse connections and retry failures.
+    With output_dir the audio gets a unique file name inside that directory,
+    otherwise it is written to temp_<hash>.mp3 in the working directory.
+    Audio is served from the on-disk TTS cache when the same voice, model,
+    settings and text were synthesized before.
     """
     # Check both possible environment variable names
     api_key = os.environ.get("ELEVEN_LAB_API_KEY") or os.environ.get("ELEVENLABS_API_KEY")
     if not api_key:
         raise Exception("Please set the ELEVEN_LAB_API_KEY environment variable.")
     
-    voice_id = "21m00Tcm4TlvDq8ikWAM"  # Your Eleven Labs voice ID
+    voice_id = ELEVENLABS_VOICE_ID
     
     # Note the updated URL format with voice_id in the path
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+    url = f"{ELEVENLABS_API_URL}/v1/text-to-speech/{voice_id}"
     
     headers = {
         "xi-api-key": api_key,
@@ -39,37 +84,273 @@ def get_narration(text):
     
     payload = {
         "text": text,
-        "model_id": "eleven_monolingual_v1"  # Adding the model ID which is often required
+        "model_id": ELEVENLABS_MODEL_ID
     }
     
-    response = requests.post(url, json=payload, headers=headers)
+    if output_dir:
+        fd, temp_audio_file = tempfile.mkstemp(prefix="narration_", suffix=".mp3", dir=output_dir)
+        os.close(fd)
+    else:
+        temp_audio_file = f"temp_{abs(hash(text))}.mp3"
+    
+    # Callers delete the returned file, so hits are copied out of the cache
+    cache_key = stable_digest("elevenlabs", voice_id, payload["model_id"], text, payload.get("voice_settings"))
+    cached_file = _tts_cache.get(cache_key)
+    if cached_file:
+        try:
+            shutil.copyfile(cached_file, temp_audio_file)
+            return temp_audio_file
+        except OSError:
+            # Evicted by another process in the meantime
+            pass
+    
+    trace = current_trace()
+    with trace.stage("tts"):
+        response = (session or requests).post(url, json=payload, headers=headers)
+    # Failed requests are counted (and billed) too
+    trace.count("tts_requests")
+    trace.count("tts_characters", len(text))
     if response.status_code != 200:
         raise Exception(f"Error from Eleven Labs API: {response.text}")
+    trace.count("bytes_downloaded", len(response.content))
 
-    temp_audio_file = f"temp_{abs(hash(text))}.mp3"
     with open(temp_audio_file, "wb") as f:
         f.write(response.content)
+    _tts_cache.put_bytes(cache_key, response.content)
         
     return temp_audio_file
 
-def download_image(image_url):
+def get_tts_mode(tts_mode=None):
+    """"segment" (one TTS request per text, default) or "batched" (one for all), from VIDEO_TTS_MODE"""
+    tts_mode = tts_mode or os.environ.get("VIDEO_TTS_MODE", "segment")
+    if tts_mode not in ("segment", "batched"):
+        raise ValueError(f"Unknown TTS mode: {tts_mode}")
+    return tts_mode
+
+def get_narrations_batched(texts, session=None, output_dir=None):
     """
-    Download an image from a URL and save it as a temporary file.
+    Narration audio for several texts from a single Eleven Labs request.
+    
+    The texts are joined with a pause (see video.narration) and synthesized
+    together through the with-timestamps endpoint; the audio is cut back into
+    one clip per text, trimmed to its speech without the pauses, located from
+    the returned character timings. A provider without timings (or without that
+    endpoint, 404/405) gets a plain request and the clips are cut around the
+    longest silences; if those cannot be found either, the texts are synthesized one
+    by one. Any other error status is raised without a second request.
+    
+    Clips are cached per text like get_narration, so only texts not narrated
+    before are sent. Returns one file per text (repeated texts get copies),
+    all owned by the caller.
     """
-    response = requests.get(image_url)
-    if response.status_code != 200:
-        raise Exception(f"Failed to download image from {image_url}")
+    api_key = os.environ.get("ELEVEN_LAB_API_KEY") or os.environ.get("ELEVENLABS_API_KEY")
+    if not api_key:
+        raise Exception("Please set the ELEVEN_LAB_API_KEY environment variable.")
+    
+    def new_file(prefix):
+        fd, path = tempfile.mkstemp(prefix=prefix, suffix=".mp3", dir=output_dir)
+        os.close(fd)
+        return path
     
-    # Create a temporary file for the image
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".jpg")
-    temp_file.write(response.content)
-    temp_file.close()
+    # A clip cut from a joint narration differs from a separately synthesized one
+    def cache_key(text):
+        return stable_digest("elevenlabs-batched", ELEVENLABS_VOICE_ID, ELEVENLABS_MODEL_ID, text, SEGMENT_BREAK, SEGMENT_EDGE_PAD)
+    
+    clips = {}
+    for text in dict.fromkeys(texts):
+        cached_file = _tts_cache.get(cache_key(text))
+        if cached_file:
+            audio_file = new_file("narration_")
+            try:
+                shutil.copyfile(cached_file, audio_file)
+                clips[text] = audio_file
+                continue
+            except OSError:
+                os.remove(audio_file)
+    pending = [text for text in dict.fromkeys(texts) if text not in clips]
+    
+    if len(pending) == 1:
+        clips[pending[0]] = get_narration(pending[0], session=session, output_dir=output_dir)
+    elif pending:
+        url = f"{ELEVENLABS_API_URL}/v1/text-to-speech/{ELEVENLABS_VOICE_ID}"
+        headers = {"xi-api-key": api_key, "Content-Type": "application/json"}
+        payload = {"text": join_narration(pending), "model_id": ELEVENLABS_MODEL_ID}
+        trace = current_trace()
+        
+        spans = None
+        with trace.stage("tts"):
+            response = (session or requests).post(f"{url}/with-timestamps", json=payload, headers=headers)
+            # Every request sent is counted, including the fallback below
+            trace.count("tts_requests")
+            trace.count("tts_characters", len(payload["text"]))
+            if response.status_code == 200:
+                body = response.json()
+                audio = base64.b64decode(body["audio_base64"])
+                if body.get("alignment"):
+                    spans = get_alignment_spans(body["alignment"], pending)
+            elif response.status_code in (404, 405):
+                # Provider without the timestamps endpoint; boundaries come from the audio
+                response = (session or requests).post(url, json=payload, headers=headers)
+                trace.count("tts_requests")
+                trace.count("tts_characters", len(payload["text"]))
+                if response.status_code != 200:
+                    raise Exception(f"Error from Eleven Labs API: {response.text}")
+                audio = response.content
+            else:
+                # Auth, quota and validation errors would fail the plain endpoint too
+                raise Exception(f"Error from Eleven Labs API: {response.text}")
+        trace.count("bytes_downloaded", len(audio))
+        
+        narration_file = new_file("narration_all_")
+        try:
+            with open(narration_file, "wb") as f:
+                f.write(audio)
+            if spans is None:
+                spans = get_silence_spans(detect_silences(narration_file), get_audio_duration(narration_file), len(pending))
+            if spans is None:
+                print("Could not find the segment boundaries in the joint narration, synthesizing per segment")
+                for text in pending:
+                    clips[text] = get_narration(text, session=session, output_dir=output_dir)
+            else:
+                segment_files = [new_file("narration_") for _ in pending]
+                split_audio(narration_file, spans, segment_files)
+                for text, segment_file in zip(pending, segment_files):
+                    _tts_cache.put_file(cache_key(text), segment_file)
+                    clips[text] = segment_file
+        finally:
+            os.remove(narration_file)
+    
+    audio_files = []
+    for text in texts:
+        if clips[text] in audio_files:
+            # Callers delete their files, so a repeated text gets its own copy
+            audio_file = new_file("narration_")
+            shutil.copyfile(clips[text], audio_file)
+        else:
+            audio_file = clips[text]
+        audio_files.append(audio_file)
+    return audio_files
+
+def get_tts_cache_stats():
+    """Hit/miss counters of the narration cache in this process"""
+    return _tts_cache.stats()
+
+# Panel images keyed on their URL (revalidated with ETag / Last-Modified) and
+# content, plus their downscaled variants per render profile scale
+_image_cache = ImageCache(
+    os.environ.get("IMAGE_CACHE_DIR", os.path.join(".cache", "images")),
+    max_bytes=int(os.environ.get("IMAGE_CACHE_MAX_MB", "1000")) * 1024 * 1024,
+    variant_max_bytes=int(os.environ.get("IMAGE_VARIANT_CACHE_MAX_MB", "500")) * 1024 * 1024
+)
+
+def get_image_cache():
+    """The image cache, or None when VIDEO_IMAGE_CACHE disables it (default: enabled)"""
+    if os.environ.get("VIDEO_IMAGE_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    return _image_cache
+
+def download_image(image_url, session=None, output_dir=None):
+    """
+    Download an image from a URL and save it as a temporary file (inside output_dir if given).
+    
+    The body is streamed to disk, so a large image is never held in memory whole.
+    With the image cache enabled (see get_image_cache) a URL fetched before is
+    copied from the cache while it is fresh, and revalidated with the server
+    after that, so unchanged images are not downloaded again.
+    """
+    image_cache = get_image_cache()
+    if image_cache is not None:
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".jpg", dir=output_dir)
+        temp_file.close()
+        try:
+            return image_cache.fetch(image_url, temp_file.name, session=session)
+        except Exception:
+            os.remove(temp_file.name)
+            raise
+    
+    trace = current_trace()
+    with trace.stage("image_download"), (session or requests).get(image_url, stream=True) as response:
+        if response.status_code != 200:
+            raise Exception(f"Failed to download image from {image_url}")
+        
+        # Create a temporary file for the image
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".jpg", dir=output_dir)
+        try:
+            for chunk in response.iter_content(chunk_size=1 << 16):
+                temp_file.write(chunk)
+                trace.count("bytes_downloaded", len(chunk))
+        finally:
+            temp_file.close()
+    trace.count("images_downloaded")
     
     return temp_file.name
 
+def acquire_assets(image_urls, texts=None, max_concurrency=DEFAULT_MAX_CONCURRENCY, output_dir=None, tts_mode="segment"):
+    """
+    Fetch all images and, if texts are given, all narration clips concurrently.
+    
+    At most max_concurrency requests are in flight, connections are reused per
+    host and failed downloads are retried with backoff; TTS requests only on
+    connection errors and 429 (see create_session). Identical narration lines
+    are synthesized once; with tts_mode "batched" all of them are synthesized in
+    one request (see get_narrations_batched) alongside the image downloads.
+    Files are written to output_dir when given. Returns (image_files,
+    audio_files) in segment order; audio_files is None when no texts are given.
+    """
+    session = create_session(max_concurrency, post_retry_prefixes=[ELEVENLABS_API_URL])
+    unique_texts = list(dict.fromkeys(texts)) if texts else []
+    jobs = [("image", url) for url in image_urls]
+    if tts_mode == "batched" and unique_texts:
+        jobs.append(("narrations", unique_texts))
+    else:
+        jobs += [("narration", text) for text in unique_texts]
+    
+    def fetch(job):
+        kind, value = job
+        if kind == "image":
+            return download_image(value, session=session, output_dir=output_dir)
+        if kind == "narrations":
+            return get_narrations_batched(value, session=session, output_dir=output_dir)
+        return get_narration(value, session=session, output_dir=output_dir)
+    
+    try:
+        results = map_concurrently(fetch, jobs, max_concurrency)
+    except Exception as e:
+        # Don't leave behind the files that did download
+        for result in getattr(e, "partial_results", None) or []:
+            for file in result if isinstance(result, list) else [result]:
+                if file and os.path.exists(file):
+                    os.remove(file)
+        raise
+    finally:
+        session.close()
+    
+    image_files = results[:len(image_urls)]
+    if texts is None:
+        return image_files, None
+    
+    narration_files = results[len(image_urls)] if tts_mode == "batched" and unique_texts else results[len(image_urls):]
+    narration_by_text = dict(zip(unique_texts, narration_files))
+    return image_files, [narration_by_text[text] for text in texts]
+
 # Load Whisper model once to avoid reloading
 _whisper_model = None
 
+# Word timings keyed on the audio content and the Whisper model size
+_alignment_cache = DiskCache(
+    os.environ.get("ALIGNMENT_CACHE_DIR", os.path.join(".cache", "alignment")),
+    max_bytes=int(os.environ.get("ALIGNMENT_CACHE_MAX_MB", "50")) * 1024 * 1024,
+    suffix=".json",
+    name="alignment"
+)
+
+# Silence inserted between clips in a batched transcription, in seconds
+BATCH_GAP_SECONDS = 1.0
+
+# "forced" aligns the known narration text to the audio; "transcribe" runs
+# open-vocabulary Whisper transcription with word timestamps
+DEFAULT_ALIGNER = os.environ.get("WHISPER_ALIGNER", "forced")
+
 def get_whisper_model(model_size="base"):
     """
     Get or initialize Whisper model with specified size
@@ -79,20 +360,124 @@ def get_whisper_model(model_size="base"):
         _whisper_model = whisper.load_model(model_size)
     return _whisper_model
 
-def get_word_timestamps_with_whisper(audio_file, text=None):
+def get_alignment_cache_key(audio_file, model_size="base", aligner="transcribe", text=None):
+    """Cache key for the word timings of an audio file"""
+    if aligner == "forced":
+        return stable_digest("whisper-forced", model_size, "en", file_digest(audio_file), text)
+    return stable_digest("whisper", model_size, "en", file_digest(audio_file))
+
+def extract_whisper_words(result):
+    """Flatten a Whisper transcription result into word dicts"""
+    words_with_timestamps = []
+    for segment in result["segments"]:
+        for word_info in segment["words"]:
+            words_with_timestamps.append({
+                "word": word_info["word"].strip(),
+                "start": word_info["start"],
+                "end": word_info["end"]
+            })
+    return words_with_timestamps
+
+def align_text_with_whisper(audio_file, text, model_size="base"):
+    """
+    Forced alignment of the known narration text against the audio.
+    
+    Instead of decoding, the script's tokens are fed to the decoder once and
+    word boundaries are read from the cross-attention alignment (Whisper's own
+    word-timestamp DTW). The returned words are exactly text.split(), so word
+    count and spelling always match the script. Clips must fit in one 30 s
+    Whisper window.
+    """
+    import torch
+    from whisper.audio import HOP_LENGTH, N_FRAMES, N_SAMPLES, SAMPLE_RATE, log_mel_spectrogram
+    from whisper.timing import find_alignment
+    from whisper.tokenizer import get_tokenizer
+    
+    script_words = text.split()
+    if not script_words:
+        return []
+    
+    model = get_whisper_model(model_size)
+    audio = whisper.load_audio(audio_file)
+    num_frames = len(audio) // HOP_LENGTH
+    if num_frames > N_FRAMES:
+        raise ValueError(f"Audio longer than {N_FRAMES * HOP_LENGTH // SAMPLE_RATE}s cannot be force-aligned in one window")
+    
+    # Padded with silence before the log-mel, as whisper.transcribe does: zero
+    # log-mel frames are not silence and would throw the token timings off
+    mel = log_mel_spectrogram(audio, model.dims.n_mels, padding=N_SAMPLES)[:, :N_FRAMES]
+    dtype = torch.float16 if model.device.type == "cuda" else torch.float32
+    mel = mel.to(model.device).to(dtype)
+    
+    tokenizer = get_tokenizer(
+        model.is_multilingual,
+        num_languages=getattr(model, "num_languages", 99),
+        language="en",
+        task="transcribe"
+    )
+    aligned_text = " " + " ".join(script_words)
+    timings = find_alignment(model, tokenizer, tokenizer.encode(aligned_text), mel, num_frames)
+    if "".join(timing.word for timing in timings) != aligned_text:
+        raise ValueError("Aligned tokens do not reproduce the narration text")
+    
+    # Aligned sub-words and punctuation are merged back into the script's words
+    words_with_timestamps = [None] * len(script_words)
+    char_to_word = []
+    for word_idx, word in enumerate(script_words):
+        char_to_word += [word_idx] * (len(word) + 1)  # Leading space belongs to the word
+    
+    position = 0
+    for timing in timings:
+        covered = set(char_to_word[position:position + len(timing.word)])
+        position += len(timing.word)
+        for word_idx in covered:
+            entry = words_with_timestamps[word_idx]
+            if entry is None:
+                words_with_timestamps[word_idx] = {"word": script_words[word_idx], "start": float(timing.start), "end": float(timing.end)}
+            else:
+                entry["start"] = min(entry["start"], float(timing.start))
+                entry["end"] = max(entry["end"], float(timing.end))
+    
+    return words_with_timestamps
+
+def get_word_timestamps_with_whisper(audio_file, text=None, model_size="base", aligner=None):
     """
     Get precise word-level timestamps using Whisper
     
     Args:
         audio_file: Path to the audio file
         text: Optional reference text to improve alignment
+        model_size: Whisper model size, part of the cache key
+        aligner: "forced" aligns the given text (default, see WHISPER_ALIGNER),
+            "transcribe" runs open transcription. Forced alignment falls back to
+            transcription, and both fall back to estimated timestamps.
     
     Returns:
         List of words with their start and end timestamps
     """
+    aligner = aligner or DEFAULT_ALIGNER
+    if aligner == "forced" and text and text.strip():
+        try:
+            cache_key = get_alignment_cache_key(audio_file, model_size, "forced", text)
+            cached_words = _alignment_cache.get_json(cache_key)
+            if cached_words is not None:
+                return cached_words
+            
+            words_with_timestamps = align_text_with_whisper(audio_file, text, model_size)
+            _alignment_cache.put_json(cache_key, words_with_timestamps)
+            return words_with_timestamps
+        except Exception as e:
+            print(f"Forced alignment failed, falling back to transcription: {e}")
+    
     try:
+        # Identical audio always aligns the same way
+        cache_key = get_alignment_cache_key(audio_file, model_size)
+        cached_words = _alignment_cache.get_json(cache_key)
+        if cached_words is not None:
+            return cached_words
+        
         # Load Whisper model
-        model = get_whisper_model()
+        model = get_whisper_model(model_size)
         
         # Transcribe with word timestamps
         result = model.transcribe(
@@ -101,16 +486,9 @@ def get_word_timestamps_with_whisper(audio_file, text=None):
             language="en"
         )
         
-        words_with_timestamps = []
-        
         # Extract words and timestamps
-        for segment in result["segments"]:
-            for word_info in segment["words"]:
-                words_with_timestamps.append({
-                    "word": word_info["word"].strip(),
-                    "start": word_info["start"],
-                    "end": word_info["end"]
-                })
+        words_with_timestamps = extract_whisper_words(result)
+        _alignment_cache.put_json(cache_key, words_with_timestamps)
         
         return words_with_timestamps
     
@@ -119,8 +497,106 @@ def get_word_timestamps_with_whisper(audio_file, text=None):
         # Fall back to estimated timestamps
         return create_estimated_word_timestamps(text, get_audio_duration(audio_file))
 
+def get_word_timestamps_batched(audio_files, texts, model_size="base", aligner=None):
+    """
+    Word timestamps for many narration clips with at most one Whisper pass.
+    
+    With the forced aligner every clip is aligned on its own against its text,
+    which needs no decoding and is already cheaper than a batched transcription.
+    
+    Cached clips are served from the alignment cache. The remaining clips are
+    decoded, joined with a short silence between them and transcribed once;
+    the words are then split back per clip by where they fall on the joined
+    timeline and cached individually.
+    
+    Returns one list of words per audio file, with clip-relative timestamps.
+    """
+    aligner = aligner or DEFAULT_ALIGNER
+    if aligner == "forced":
+        return [get_word_timestamps_with_whisper(audio_file, text, model_size, aligner) for audio_file, text in zip(audio_files, texts)]
+    
+    results = [None] * len(audio_files)
+    pending = {}  # cache key -> indexes of clips with that audio
+    
+    for i, audio_file in enumerate(audio_files):
+        cache_key = get_alignment_cache_key(audio_file, model_size)
+        cached_words = _alignment_cache.get_json(cache_key)
+        if cached_words is not None:
+            results[i] = cached_words
+        else:
+            pending.setdefault(cache_key, []).append(i)
+    
+    if pending:
+        try:
+            sample_rate = whisper.audio.SAMPLE_RATE
+            gap = np.zeros(int(BATCH_GAP_SECONDS * sample_rate), dtype=np.float32)
+            
+            pieces = []
+            clip_ranges = []  # (cache key, start, end) on the joined timeline
+            offset = 0
+            for cache_key, indexes in pending.items():
+                audio = whisper.load_audio(audio_files[indexes[0]])
+                clip_ranges.append((cache_key, offset / sample_rate, (offset + len(audio)) / sample_rate))
+                pieces += [audio, gap]
+                offset += len(audio) + len(gap)
+            
+            model = get_whisper_model(model_size)
+            result = model.transcribe(np.concatenate(pieces), word_timestamps=True, language="en")
+            all_words = extract_whisper_words(result)
+            
+            for cache_key, clip_start, clip_end in clip_ranges:
+                # A word belongs to the clip its midpoint falls in, gap included
+                clip_words = []
+                for word in all_words:
+                    midpoint = (word["start"] + word["end"]) / 2
+                    if clip_start <= midpoint < clip_end + BATCH_GAP_SECONDS:
+                        clip_words.append({
+                            "word": word["word"],
+                            "start": max(0.0, word["start"] - clip_start),
+                            "end": max(0.0, min(word["end"], clip_end) - clip_start)
+                        })
+                
+                _alignment_cache.put_json(cache_key, clip_words)
+                for i in pending[cache_key]:
+                    results[i] = clip_words
+        
+        except Exception as e:
+            print(f"Error getting batched word timestamps with Whisper: {e}")
+            # Fall back to aligning the remaining clips one by one
+            for indexes in pending.values():
+                for i in indexes:
+                    if results[i] is None:
+                        results[i] = get_word_timestamps_with_whisper(audio_files[i], texts[i], model_size, aligner)
+    
+    # Callers shift timestamps in place, so every clip gets its own copies
+    return [[dict(word) for word in words] for words in results]
+
+def align_narration(audio_files, texts):
+    """
+    Word timestamps for each narration clip.
+    
+    Uses the shared alignment server when ALIGNMENT_SERVER_ADDRESS is set, so
+    web workers don't each load a Whisper model, and aligns in-process otherwise
+    or when the server can't be reached.
+    """
+    with current_trace().stage("align"):
+        if get_server_address():
+            try:
+                return request_alignment(audio_files, texts)
+            except Exception as e:
+                print(f"Alignment server unavailable, aligning locally: {e}")
+        return get_word_timestamps_batched(audio_files, texts)
+
 def get_audio_duration(audio_file):
-    """Get the duration of an audio file using moviepy"""
+    """
+    Get the duration of an audio file.
+    
+    Read from the file headers (see video.audio) without decoding; moviepy is
+    only used for files whose headers do not give a duration.
+    """
+    duration = read_audio_duration(audio_file)
+    if duration is not None:
+        return duration
     try:
         audio = AudioFileClip(audio_file)
         duration = audio.duration
@@ -188,60 +664,6 @@ def format_srt_time(seconds):
     return f"{hours:02d}:{minutes:02d}:{int(seconds_remainder):02d},{milliseconds:03d}"
 
 # Caption.ai style subtitle functions
-def get_system_fonts():
-    """Get available system fonts based on OS"""
-    system = platform.system()
-    font_paths = []
-    
-    if system == "Windows":
-        font_dir = Path("C:/Windows/Fonts")
-        font_paths = [font_dir / "Arial.ttf", font_dir / "arialbd.ttf"]
-    elif system == "Darwin":  # macOS
-        font_paths = [
-            Path("/System/Library/Fonts/Supplemental/Arial.ttf"),
-            Path("/System/Library/Fonts/Supplemental/Arial Bold.ttf")
-        ]
-    else:  # Linux
-        font_paths = [
-            Path("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"),
-            Path("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf")
-        ]
-    
-    return font_paths
-
-def load_font(size, bold=True):
-    """Load system font with fallback"""
-    font_paths = get_system_fonts()
-    
-    if bold:
-        font_paths = [p for p in font_paths if "bold" in p.name.lower() or "bd" in p.name.lower()] + [p for p in font_paths if "bold" not in p.name.lower() and "bd" not in p.name.lower()]
-    
-    for font_path in font_paths:
-        try:
-            if font_path.exists():
-                return ImageFont.truetype(str(font_path), size)
-        except (IOError, OSError):
-            continue
-    
-    return ImageFont.load_default()
-
-def get_text_dimensions(text, font):
-    """Get text dimensions with fallback"""
-    text = text.strip()
-    if font is None:
-        return len(text) * 8, 16
-    
-    try:
-        if hasattr(font, "getbbox"):
-            bbox = font.getbbox(text)
-            return bbox[2] - bbox[0], bbox[3] - bbox[1]
-        elif hasattr(font, "getsize"):
-            return font.getsize(text)
-        else:
-            return len(text) * (font.size // 2), font.size
-    except:
-        return len(text) * 8, 16
-
 def create_words_with_timestamps(texts, durations):
     """Create word-level timestamps from text segments and their durations"""
     words_with_timestamps = []
@@ -272,7 +694,7 @@ def create_words_with_timestamps(texts, durations):
     return words_with_timestamps
 
 def create_captionsai_style_frame(frame, words_to_display, current_word_idx, frame_width, frame_height, font=None, color_scheme=None):
-    """Create a frame with captions.ai style subtitles"""
+    """Create a frame with captions.ai style subtitles (reference PIL path, see CaptionCompositor)"""
     try:
         # Convert BGR to RGB for PIL
         frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -299,9 +721,6 @@ def create_captionsai_style_frame(frame, words_to_display, current_word_idx, fra
         max_width = int(frame_width * 0.8)
         wrapped_lines = []
         
-        # Calculate average character width
-        avg_char_width, _ = get_text_dimensions("x", font)
-        
         # Simple word wrapping
         words = full_text.split()
         current_line = []
@@ -402,8 +821,24 @@ def create_captionsai_style_frame(frame, words_to_display, current_word_idx, fra
         print(f"Error creating captioned frame: {e}")
         return frame
 
-def add_dynamic_subtitles(video_path, words_with_timestamps, output_path):
-    """Add captions.ai style dynamic subtitles to video"""
+def add_dynamic_subtitles(video_path, words_with_timestamps, output_path, segment_start_times=None, render_mode="event", temp_dir=None, progress=None,
+                          encode_options=None, caption_scale=1.0):
+    """
+    Add captions.ai style dynamic subtitles to video
+
+    Args:
+        video_path: Video made of still-image segments
+        words_with_timestamps: Word-level timestamps for the whole video
+        output_path: Where to write the captioned video
+        segment_start_times: Start time of each still-image segment (defaults to one segment)
+        render_mode: "event" renders the caption once per (segment, current word)
+            state and repeats it until the state changes; "frame" renders every frame
+        temp_dir: Directory for the intermediate files (default: next to output_path)
+        progress: Optional progress(stage, fraction) callback, fed from the frame counter
+        encode_options: preset / crf / audio_bitrate for the final encode (see video.profiles)
+        caption_scale: Scale of the caption pixel constants (see CaptionCompositor)
+    """
+    encode_options = encode_options or {}
     try:
         # Open video
         video = cv2.VideoCapture(video_path)
@@ -413,9 +848,14 @@ def add_dynamic_subtitles(video_path, words_with_timestamps, output_path):
         fps = video.get(cv2.CAP_PROP_FPS)
         frame_width = int(video.get(cv2.CAP_PROP_FRAME_WIDTH))
         frame_height = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT)) or 1
+        report_every = max(1, int(fps))
         
         # Create output video writer - use temp file name
-        temp_output = output_path + ".temp.mp4"
+        if temp_dir:
+            temp_output = os.path.join(temp_dir, os.path.basename(output_path) + ".temp.mp4")
+        else:
+            temp_output = output_path + ".temp.mp4"
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
         output_video = cv2.VideoWriter(
             temp_output, 
@@ -431,62 +871,85 @@ def add_dynamic_subtitles(video_path, words_with_timestamps, output_path):
         font_size = int(frame_height * 0.05)
         font = load_font(font_size, bold=True)
         color_scheme = {"text": (255, 255, 255), "highlight": (255, 230, 0), "shadow": (0, 0, 0)}
+        compositor = CaptionCompositor(frame_width, frame_height, font=font, color_scheme=color_scheme, scale=caption_scale)
+        
+        # Word lookups come from one array-backed timeline built per video
+        timeline = WordTimeline(words_with_timestamps)
+        if render_mode == "event":
+            events = timeline.caption_events(fps, segment_start_times)
+        else:
+            # One event per frame: every frame is rendered
+            events = None
+            frame_word = timeline.frame_word_map(fps)
         
         # Process frames
         frame_idx = 0
+        renders = 0
+        event_idx = 0
+        event_end = 0
+        rendered_frame = None
         while True:
+            if frame_idx < event_end:
+                # Caption state and still image are unchanged: repeat the rendered frame
+                if not video.grab():
+                    break
+                output_video.write(rendered_frame)
+                frame_idx += 1
+                if progress and frame_idx % report_every == 0:
+                    progress("rendering", frame_idx / frame_count)
+                continue
+            
             ret, frame = video.read()
             if not ret:
                 break
             
-            # Calculate current time based on frame index
-            current_time = frame_idx / fps
-            
-            # Find the current word based on timestamp
-            current_word_idx = None
-            for idx, word in enumerate(words_with_timestamps):
-                if word["start"] <= current_time <= word["end"]:
-                    current_word_idx = idx
-                    break
+            if events is None:
+                # Look up the current word precomputed for this frame index
+                current_word_idx = int(frame_word[frame_idx]) if frame_idx < len(frame_word) else -1
+                if current_word_idx < 0:
+                    current_word_idx = None
+                event_end = frame_idx + 1
+            else:
+                while events[event_idx][1] <= frame_idx:
+                    event_idx += 1
+                _, event_end, current_word_idx, _ = events[event_idx]
             
             # If we have a current word, add subtitles
             if current_word_idx is not None:
                 # Determine the window of words to display
-                window_size = 8  # Show 8 words at a time
-                window_start = max(0, current_word_idx - window_size // 2)
-                window_end = min(len(words_with_timestamps), window_start + window_size)
+                window_start, window_end = timeline.window(current_word_idx)
                 words_to_display = words_with_timestamps[window_start:window_end]
                 
                 # Adjust current_word_idx to be relative to the window
                 relative_current_idx = current_word_idx - window_start
                 
-                frame = create_captionsai_style_frame(
-                    frame, 
-                    words_to_display, 
-                    relative_current_idx, 
-                    frame_width, 
-                    frame_height,
-                    font=font,
-                    color_scheme=color_scheme
-                )
+                # Blend pre-rasterized word sprites straight into the BGR frame
+                compositor.render(frame, words_to_display, relative_current_idx)
+                renders += 1
             
             output_video.write(frame)
+            rendered_frame = frame
             frame_idx += 1
+            if progress and frame_idx % report_every == 0:
+                progress("rendering", frame_idx / frame_count)
+        
+        print(f"Rendered {renders} caption overlays for {frame_idx} frames ({render_mode} mode)")
+        current_trace().count("caption_renders", renders)
         
         # Release resources
         video.release()
         output_video.release()
         
-        # Now add back the audio using moviepy
-        silent_video = VideoFileClip(temp_output)
-        original_video = VideoFileClip(video_path)
-        final_video = silent_video.set_audio(original_video.audio)
-        final_video.write_videofile(output_path, codec="libx264", audio_codec="aac")
+        # Now add back the audio: the captioned frames are encoded with libx264
+        # and the original narration track is copied, not decoded
+        mux_audio(temp_output, video_path, output_path, video_args=[
+            "-c:v", "libx264",
+            "-preset", encode_options.get("preset", "medium"),
+            "-crf", str(encode_options.get("crf", 23)),
+            "-pix_fmt", "yuv420p",
+        ])
         
         # Clean up
-        silent_video.close()
-        original_video.close()
-        final_video.close()
         if os.path.exists(temp_output):
             os.remove(temp_output)
         
@@ -494,28 +957,671 @@ def add_dynamic_subtitles(video_path, words_with_timestamps, output_path):
         print(f"Error adding subtitles to video: {e}")
         raise
 
-def generate_video(texts, image_urls, output_path=r"Flask\uploads\output.mp4", subtitle_style="modern"):
+def load_still_frame(image_file, frame_width, frame_height):
+    """Load an image as a BGR frame centred on a black canvas, like MoviePy's compose"""
+    image = cv2.imread(image_file, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"Could not read image file: {image_file}")
+    
+    frame = np.zeros((frame_height, frame_width, 3), dtype=np.uint8)
+    image_height, image_width = image.shape[:2]
+    x = (frame_width - image_width) // 2
+    y = (frame_height - image_height) // 2
+    frame[y:y + image_height, x:x + image_width] = image
+    return frame
+
+def get_canvas_size(image_files):
+    """
+    Frame size used by concatenate_videoclips(method="compose"): the largest
+    image, rounded up to even dimensions for yuv420p. Returns (width, height).
+    Sizes come from the image headers; no image is decoded.
+    """
+    sizes = [get_image_size(image_file) for image_file in image_files]
+    frame_width = max(w for w, _ in sizes)
+    frame_height = max(h for _, h in sizes)
+    return frame_width + frame_width % 2, frame_height + frame_height % 2
+
+def render_still_segments(image_files, audio_files, durations, texts, output_path, fps=24, work_dir=None, progress=None,
+                          encode_options=None):
+    """
+    Fast path for the "modern" subtitle style.
+    
+    Each still image is looped by ffmpeg with its narration and its subtitle
+    burned in, in one encode per segment; the segments are then joined with the
+    concat demuxer using stream copy. No frame ever passes through Python.
+    Intermediates go to work_dir, or to a temp directory that is removed afterwards.
+    progress(stage, fraction) is called after every segment; encode_options
+    (preset / crf / audio_bitrate) go to every segment encode.
+    """
+    frame_width, frame_height = get_canvas_size(image_files)
+    segment_dir = work_dir or tempfile.mkdtemp(prefix="segments_")
+    try:
+        segment_files = []
+        for i, (image_file, audio_file, duration, text) in enumerate(zip(image_files, audio_files, durations, texts)):
+            srt_file = create_srt_file([text], [duration], output_srt=os.path.join(segment_dir, f"segment_{i:03d}.srt"))
+            segment_file = os.path.join(segment_dir, f"segment_{i:03d}.mp4")
+            encode_still_segment(
+                image_file, audio_file, duration, segment_file,
+                frame_width, frame_height, fps=fps, subtitle_file=srt_file, **(encode_options or {})
+            )
+            segment_files.append(segment_file)
+            if progress:
+                progress("rendering", sum(durations[:i + 1]) / sum(durations))
+        
+        concat_segments(segment_files, output_path, list_file=os.path.join(segment_dir, "segments.txt"))
+    finally:
+        if not work_dir:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+    
+    return output_path
+
+def iter_captioned_frames(image_files, segment_start_times, words_with_timestamps, frame_size, compositor, fps=24, total_frames=None):
+    """
+    Yield (frame, repeat, captioned) for every caption state of the video.
+    
+    frame is shown for the next `repeat` frames; captioned tells whether a
+    caption was drawn on it. Memory stays flat however long the video is:
+    only the current segment's still is decoded, and captions are drawn into
+    one reused buffer, so a yielded frame is only valid until the next one.
+    """
+    frame_width, frame_height = frame_size
+    timeline = WordTimeline(words_with_timestamps)
+    if total_frames is None:
+        total_frames = int(round(segment_start_times[-1] * fps))
+    
+    base_frame = None
+    base_segment = None
+    caption_frame = np.empty((frame_height, frame_width, 3), dtype=np.uint8)
+    for start_frame, end_frame, current_word_idx, segment_idx in timeline.caption_events(fps, segment_start_times):
+        if start_frame >= total_frames:
+            break
+        segment_idx = min(segment_idx, len(image_files) - 1)
+        
+        if segment_idx != base_segment:
+            # Drop the previous still before decoding the next one
+            base_frame = None
+            base_frame = load_still_frame(image_files[segment_idx], frame_width, frame_height)
+            base_segment = segment_idx
+        
+        frame = base_frame
+        if current_word_idx is not None:
+            window_start, window_end = timeline.window(current_word_idx)
+            np.copyto(caption_frame, base_frame)
+            frame = compositor.render(caption_frame, words_with_timestamps[window_start:window_end], current_word_idx - window_start)
+        
+        yield frame, min(end_frame, total_frames) - start_frame, current_word_idx is not None
+
+def render_captioned_video(image_files, audio_files, segment_start_times, words_with_timestamps, output_path, fps=24, frame_size=None, progress=None,
+                           encode_options=None, caption_scale=1.0):
+    """
+    Render the captions.ai style video in a single encode.
+    
+    Frames are composited in memory (one caption render per caption state) and
+    piped as raw BGR into one ffmpeg libx264 process that also muxes the
+    narration, so there is no intermediate video file and no re-encode.
+    Frames come from iter_captioned_frames, which keeps one segment in memory.
+    frame_size (width, height) overrides the canvas computed from the images.
+    progress(stage, fraction) is called with the share of frames written.
+    encode_options (preset / crf / audio_bitrate) go to the encoder and
+    caption_scale sizes the caption pixel constants (see video.profiles).
+    """
+    frame_width, frame_height = frame_size or get_canvas_size(image_files)
+    
+    font_size = int(frame_height * 0.05)
+    font = load_font(font_size, bold=True)
+    color_scheme = {"text": (255, 255, 255), "highlight": (255, 230, 0), "shadow": (0, 0, 0)}
+    compositor = CaptionCompositor(frame_width, frame_height, font=font, color_scheme=color_scheme, scale=caption_scale)
+    
+    total_frames = int(round(segment_start_times[-1] * fps))
+    frames = iter_captioned_frames(image_files, segment_start_times, words_with_timestamps, (frame_width, frame_height),
+                                   compositor, fps=fps, total_frames=total_frames)
+    
+    renders = 0
+    with FFmpegFrameWriter(output_path, frame_width, frame_height, fps=fps, audio_files=audio_files, **(encode_options or {})) as writer:
+        for frame, repeat, captioned in frames:
+            renders += captioned
+            # Identical frames for the whole interval; x264 encodes the repeats as skips
+            for _ in range(repeat):
+                writer.write(frame)
+                if progress and writer.frames_written % fps == 0:
+                    progress("rendering", writer.frames_written / total_frames)
+    
+    print(f"Rendered {renders} caption overlays for {total_frames} frames in a single encode")
+    current_trace().count("caption_renders", renders)
+    return output_path
+
+def render_ass_captioned_video(image_files, audio_files, segment_start_times, words_with_timestamps, output_path,
+                               fps=24, frame_size=None, work_dir=None, progress=None, encode_options=None, caption_scale=1.0):
+    """
+    Render the captions.ai style video with libass instead of Python.
+    
+    The captions are written as an ASS script that mirrors CaptionCompositor
+    (see video.ass_captions) and burned in by ffmpeg while it loops the still
+    images and muxes the narration, all in one encode; no frame passes
+    through Python. The script goes to work_dir (default: next to output_path).
+    encode_options and caption_scale work as in render_captioned_video.
+    """
+    frame_width, frame_height = frame_size or get_canvas_size(image_files)
+    
+    font_size = int(frame_height * 0.05)
+    font = load_font(font_size, bold=True)
+    color_scheme = {"text": (255, 255, 255), "highlight": (255, 230, 0), "shadow": (0, 0, 0)}
+    _, _, fonts_dir, _ = get_ass_font(font)
+    
+    # Named after the output: chapters rendered in parallel share a work_dir
+    subtitle_file = (os.path.join(work_dir, os.path.splitext(os.path.basename(output_path))[0] + ".ass")
+                     if work_dir else output_path + ".ass")
+    write_caption_ass(subtitle_file, words_with_timestamps, frame_width, frame_height, font,
+                      color_scheme=color_scheme, fps=fps, segment_start_times=segment_start_times, scale=caption_scale)
+    durations = [end - start for start, end in zip(segment_start_times, segment_start_times[1:])]
+    try:
+        encode_slideshow(image_files, audio_files, durations, output_path, frame_width, frame_height, fps=fps,
+                         subtitle_file=subtitle_file, fonts_dir=fonts_dir, progress=progress, **(encode_options or {}))
+    finally:
+        if not work_dir and os.path.exists(subtitle_file):
+            os.remove(subtitle_file)
+    return output_path
+
+def render_slideshow_formats(image_files, audio_files, segment_start_times, words_with_timestamps, texts, subtitle_style, output_paths,
+                             fps=24, frame_size=None, work_dir=None, progress=None, encode_options=None, caption_scale=1.0):
+    """
+    Render several output formats (see video.profiles.OUTPUT_FORMATS) in one ffmpeg run.
+    
+    output_paths maps format names to output files. The stills are decoded,
+    joined and the narration built once, then split per format, fitted to the
+    format's frame (VIDEO_FORMAT_FIT) and captioned for that frame: an ASS
+    script laid out per format for captions_ai, the SRT subtitles (which
+    libass scales) for the modern style. Subtitle files go to work_dir, or
+    to a temp directory that is removed afterwards. Returns output_paths.
+    """
+    frame_width, frame_height = frame_size or get_canvas_size(image_files)
+    durations = [end - start for start, end in zip(segment_start_times, segment_start_times[1:])]
+    subtitle_dir = work_dir or tempfile.mkdtemp(prefix="subtitles_")
+    color_scheme = {"text": (255, 255, 255), "highlight": (255, 230, 0), "shadow": (0, 0, 0)}
+    
+    try:
+        outputs = []
+        fonts_dir = None
+        srt_file = None
+        for output_format, output_path in output_paths.items():
+            width, height = get_format_size((frame_width, frame_height), output_format)
+            if subtitle_style == "captions_ai":
+                font = load_font(int(height * 0.05), bold=True)
+                _, _, fonts_dir, _ = get_ass_font(font)
+                subtitle_file = write_caption_ass(os.path.join(subtitle_dir, os.path.basename(output_path) + ".ass"),
+                                                  words_with_timestamps, width, height, font, color_scheme=color_scheme,
+                                                  fps=fps, segment_start_times=segment_start_times, scale=caption_scale)
+            else:
+                # One SRT for every format; libass sizes it to each frame
+                srt_file = srt_file or create_srt_file(texts, durations,
+                                                       output_srt=os.path.join(subtitle_dir, os.path.basename(output_path) + ".srt"))
+                subtitle_file = srt_file
+            outputs.append((output_path, width, height, subtitle_file))
+        
+        encode_slideshow_outputs(image_files, audio_files, durations, outputs, frame_width, frame_height, fps=fps,
+                                 fonts_dir=fonts_dir, fit=FORMAT_FIT, progress=progress, **(encode_options or {}))
+    finally:
+        if not work_dir:
+            shutil.rmtree(subtitle_dir, ignore_errors=True)
+    return output_paths
+
+def get_caption_backend(caption_backend=None):
+    """"ass" (libass burn-in, default) or "python" (CaptionCompositor frames), from VIDEO_CAPTION_BACKEND"""
+    caption_backend = caption_backend or os.environ.get("VIDEO_CAPTION_BACKEND", "ass")
+    if caption_backend not in ("ass", "python"):
+        raise ValueError(f"Unknown caption backend: {caption_backend}")
+    return caption_backend
+
+def render_segment(segment_idx, text, image_file, subtitle_style, segment_dir, frame_size, fps=24, caption_backend="ass",
+                   encode_options=None, caption_scale=1.0, output_formats=None, audio_file=None, words=None):
+    """
+    Narrate, align, caption and encode one chapter into its own chunk.
+    
+    Runs in a worker process. Every chunk uses the same canvas and codec
+    parameters so the chunks can be stream-copy concatenated. Timings and
+    counters are recorded in a trace of the chunk's own, returned as "trace"
+    for the parent to merge (see video.metrics).
+    
+    "segment_files" maps each of output_formats to its chunk (see
+    render_slideshow_formats), or None to the single chunk without formats.
+    
+    audio_file is narration synthesized beforehand (e.g. batched for all
+    chapters); it is consumed like the chapter's own narration. words are its
+    word timings when already aligned, otherwise the chapter aligns them itself.
+    """
+    frame_width, frame_height = frame_size
+    segment_file = os.path.join(segment_dir, f"segment_{segment_idx:03d}.mp4")
+    if output_formats:
+        segment_files = {
+            output_format: get_format_output_path(segment_file, output_format) for output_format in output_formats
+        }
+    else:
+        segment_files = {None: segment_file}
+    
+    with activate(RenderTrace(trace_dir=None)) as trace:
+        audio_file = audio_file or get_narration(text, output_dir=segment_dir)
+        try:
+            if words is None:
+                words = align_narration([audio_file], [text])[0]
+            duration = get_audio_duration(audio_file)
+            
+            with trace.stage("render"):
+                if output_formats:
+                    render_slideshow_formats([image_file], [audio_file], [0.0, duration], words, [text], subtitle_style, segment_files,
+                                             fps=fps, frame_size=frame_size, work_dir=segment_dir,
+                                             encode_options=encode_options, caption_scale=caption_scale)
+                elif subtitle_style == "captions_ai" and caption_backend == "ass":
+                    render_ass_captioned_video([image_file], [audio_file], [0.0, duration], words, segment_file, fps=fps,
+                                               frame_size=frame_size, work_dir=segment_dir,
+                                               encode_options=encode_options, caption_scale=caption_scale)
+                elif subtitle_style == "captions_ai":
+                    render_captioned_video([image_file], [audio_file], [0.0, duration], words, segment_file, fps=fps, frame_size=frame_size,
+                                           encode_options=encode_options, caption_scale=caption_scale)
+                else:
+                    srt_file = create_srt_file([text], [duration], output_srt=os.path.join(segment_dir, f"segment_{segment_idx:03d}.srt"))
+                    encode_still_segment(image_file, audio_file, duration, segment_file, frame_width, frame_height, fps=fps, subtitle_file=srt_file,
+                                         **(encode_options or {}))
+            trace.count("frames", int(round(duration * fps)))
+        finally:
+            # The narration is muxed into the chunk
+            if os.path.exists(audio_file):
+                os.remove(audio_file)
+    
+    return {"segment_files": segment_files, "duration": duration, "words": words, "trace": trace.to_dict()}
+
+# Encoded chapters keyed on everything that affects their frames, audio and codec parameters
+_segment_cache = DiskCache(
+    os.environ.get("SEGMENT_CACHE_DIR", os.path.join(".cache", "segments")),
+    max_bytes=int(os.environ.get("SEGMENT_CACHE_MAX_MB", "2000")) * 1024 * 1024,
+    suffix=".mp4",
+    name="segment"
+)
+
+# Bump when a renderer change alters the output for the same inputs
+SEGMENT_CACHE_VERSION = 1
+
+def get_segment_cache(segment_cache=None):
+    """The segment DiskCache, or None when disabled (default: VIDEO_SEGMENT_CACHE, else disabled)"""
+    if segment_cache is None:
+        segment_cache = os.environ.get("VIDEO_SEGMENT_CACHE", "0").lower() not in ("0", "false", "no", "off")
+    return _segment_cache if segment_cache else None
+
+def get_segment_cache_key(text, image_file, subtitle_style, frame_size, fps, caption_backend, encode_options, caption_scale,
+                          output_format=None, tts_mode="segment"):
+    """
+    Cache key of one encoded chapter.
+    
+    Covers the image content, the narration text, voice and TTS mode (a clip
+    cut from a batched narration sounds different), the word aligner,
+    the subtitle style and every render profile setting (canvas, fps, x264/AAC
+    options, caption scale, loudness filter), so a cached chunk can be
+    stream-copy concatenated with freshly rendered ones. Chunks of an output
+    format are keyed on the format and the fit as well.
+    """
+    return stable_digest(
+        "segment", SEGMENT_CACHE_VERSION, file_digest(image_file), text,
+        ELEVENLABS_VOICE_ID, ELEVENLABS_MODEL_ID, tts_mode, SEGMENT_EDGE_PAD if tts_mode == "batched" else None, DEFAULT_ALIGNER,
+        subtitle_style, caption_backend if subtitle_style == "captions_ai" and not output_format else None,
+        list(frame_size), fps, encode_options or {}, caption_scale, get_loudnorm_filter(),
+        *((output_format, FORMAT_FIT) if output_format else ())
+    )
+
+# Render worker pools by size, shared by every render of this process so the
+# workers start (and load Whisper) once rather than per render
+_render_pools = {}
+_render_pools_lock = threading.Lock()
+
+def init_render_worker():
+    """Preload the Whisper model in a new render worker, unless alignment goes to the alignment server"""
+    if not get_server_address():
+        try:
+            get_whisper_model()
+        except Exception as e:
+            # A failing initializer breaks the pool; chapters fall back to estimated timings instead
+            print(f"Could not preload the Whisper model in a render worker: {e}")
+
+def get_render_pool(workers):
+    """
+    The shared process pool of `workers` render workers, started on first use.
+    
+    Workers are spawned rather than forked: renders run on job queue and
+    request threads, and forking a threaded process holding torch, SQLite and
+    HTTP session state is unsafe.
+    """
+    with _render_pools_lock:
+        pool = _render_pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=init_render_worker)
+            _render_pools[workers] = pool
+        return pool
+
+def discard_render_pool(workers, pool):
+    """Drop a broken pool (a worker died) so the next render starts a new one"""
+    with _render_pools_lock:
+        if _render_pools.get(workers) is pool:
+            del _render_pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def render_segments_parallel(texts, image_files, subtitle_style, output_path, workers, fps=24, work_dir=None, progress=None,
+                             caption_backend="ass", encode_options=None, caption_scale=1.0, segment_cache=None, output_paths=None,
+                             hls=None, tts_mode="segment"):
+    """
+    Render every chapter in a process pool and stitch the chunks with a stream-copy concat.
+    
+    Captions are laid out per chapter, so a caption window never shows words
+    from the neighbouring chapter. Chunks go to work_dir, or to a temp directory
+    that is removed afterwards. progress(stage, fraction) is called as chapters finish.
+    
+    With a segment_cache (see get_segment_cache) chapters whose inputs have not
+    changed are copied from the cache and only the others are narrated, aligned
+    and encoded; new chunks are added to the cache. The narration of every
+    chapter to render is fetched concurrently up front (see acquire_assets).
+    workers == 1 renders the chapters in this process, after aligning them
+    together (see align_narration); worker processes align their own chapter.
+    
+    output_paths ({format: path}, see video.profiles.OUTPUT_FORMATS) renders
+    every chapter in each format and writes one video per format instead of
+    output_path; a chapter is reused only when all its formats are cached.
+    
+    workers > 1 renders in the shared pool of that size (see get_render_pool),
+    so concurrent renders share its workers.
+    
+    hls (video.streaming.HlsSettings) also packages every output as an HLS
+    stream in <output>_hls/ (see get_hls_dir): each chapter is segmented as
+    soon as it and all chapters before it are done, so the playlist appears
+    with the first chapter and grows while the rest render. The chunk encodes
+    should force keyframes every hls.keyframe_interval (see keyframe_args).
+    
+    With tts_mode "batched" the chapters that need rendering are narrated in
+    one TTS request (see get_narrations_batched) instead of one per chapter.
+    """
+    frame_size = get_canvas_size(image_files)
+    output_formats = list(output_paths) if output_paths else None
+    targets = output_paths or {None: output_path}
+    segment_dir = work_dir or tempfile.mkdtemp(prefix="segments_")
+    try:
+        jobs = [
+            (i, text, image_file, subtitle_style, segment_dir, frame_size, fps, caption_backend, encode_options, caption_scale, output_formats)
+            for i, (text, image_file) in enumerate(zip(texts, image_files))
+        ]
+        results = [None] * len(jobs)
+        cache_keys = [None] * len(jobs)
+        packagers = {output_format: HlsPackager(get_hls_dir(path), hls) for output_format, path in targets.items()} if hls else {}
+        published = 0
+        
+        def publish_ready():
+            # Chapters are streamed in order, so only the finished prefix is published
+            nonlocal published
+            while packagers and published < len(results) and results[published] is not None:
+                with current_trace().stage("package"):
+                    for output_format, packager in packagers.items():
+                        packager.add_chunk(results[published]["segment_files"][output_format])
+                published += 1
+        
+        if segment_cache is not None:
+            for i, (text, image_file) in enumerate(zip(texts, image_files)):
+                cache_keys[i] = {
+                    output_format: get_segment_cache_key(text, image_file, subtitle_style, frame_size, fps, caption_backend,
+                                                         encode_options, caption_scale, output_format=output_format,
+                                                         tts_mode=tts_mode)
+                    for output_format in targets
+                }
+                cached_files = {output_format: segment_cache.get(key) for output_format, key in cache_keys[i].items()}
+                if None in cached_files.values():
+                    continue
+                # Copied so eviction by another process cannot pull them from under the concat
+                segment_file = os.path.join(segment_dir, f"segment_{i:03d}.mp4")
+                segment_files = {
+                    output_format: get_format_output_path(segment_file, output_format) if output_format else segment_file
+                    for output_format in targets
+                }
+                try:
+                    for output_format, cached_file in cached_files.items():
+                        shutil.copyfile(cached_file, segment_files[output_format])
+                except OSError:
+                    continue
+                results[i] = {"segment_files": segment_files, "cached": True}
+        
+        pending = [i for i, result in enumerate(results) if result is None]
+        if segment_cache is not None:
+            print(f"Reusing {len(jobs) - len(pending)} of {len(jobs)} cached segments")
+        publish_ready()
+        
+        if pending:
+            with current_trace().stage("acquire"):
+                _, audio_files = acquire_assets([], [texts[i] for i in pending], output_dir=segment_dir, tts_mode=tts_mode)
+            claimed = set()
+            for i, audio_file in zip(pending, audio_files):
+                if audio_file in claimed:
+                    # Chapters consume their narration, so a repeated line gets its own copy
+                    copy_file = os.path.join(segment_dir, f"narration_{i:03d}.mp3")
+                    shutil.copyfile(audio_file, copy_file)
+                    audio_file = copy_file
+                claimed.add(audio_file)
+                jobs[i] += (audio_file,)
+            if workers <= 1:
+                # Aligned in one go like the whole reel: cached clips are reused, the rest batched
+                if progress:
+                    progress("aligning")
+                words_per_segment = align_narration([jobs[i][-1] for i in pending], [texts[i] for i in pending])
+                for i, words in zip(pending, words_per_segment):
+                    jobs[i] += (words,)
+        if progress:
+            progress("rendering", sum(result is not None for result in results) / len(results))
+        
+        def finished(i, result):
+            current_trace().merge(result.pop("trace"))
+            result["cached"] = False
+            results[i] = result
+            if segment_cache is not None:
+                for output_format, segment_file in result["segment_files"].items():
+                    segment_cache.put_file(cache_keys[i][output_format], segment_file)
+            publish_ready()
+            if progress:
+                progress("rendering", sum(result is not None for result in results) / len(results))
+        
+        if workers <= 1:
+            for i in pending:
+                finished(i, render_segment(*jobs[i]))
+        elif pending:
+            pool = get_render_pool(workers)
+            futures = {pool.submit(render_segment, *jobs[i]): i for i in pending}
+            try:
+                for future in as_completed(futures):
+                    finished(futures[future], future.result())
+            except BrokenProcessPool:
+                discard_render_pool(workers, pool)
+                raise
+            finally:
+                # After a failure, chapters not started yet are dropped rather than left in the shared pool
+                for future in futures:
+                    future.cancel()
+        
+        # Results are kept in chapter order regardless of completion order
+        with current_trace().stage("concat"):
+            for output_format, target_path in targets.items():
+                list_name = f"segments_{output_format.replace(':', 'x')}.txt" if output_format else "segments.txt"
+                concat_segments([result["segment_files"][output_format] for result in results], target_path,
+                                list_file=os.path.join(segment_dir, list_name))
+        for packager in packagers.values():
+            packager.finish()
+    finally:
+        if not work_dir:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+    
+    return results
+
+def write_clips(clips, output_path, fps, preset, narration_file):
+    """
+    Concatenate silent MoviePy clips into output_path with narration_file as its audio.
+    
+    MoviePy only writes the video; the narration track (see video.audio.concat_audio)
+    is muxed in by stream copy. Every clip is closed afterwards.
+    """
+    silent_video = output_path + ".silent.mp4"
+    final_video = concatenate_videoclips(clips, method="compose")
+    try:
+        with current_trace().stage("compose"):
+            final_video.write_videofile(silent_video, codec="libx264", fps=fps, audio=False, preset=preset)
+        mux_audio(silent_video, narration_file, output_path)
+    finally:
+        final_video.close()
+        for clip in clips:
+            clip.close()
+        clips.clear()
+        if os.path.exists(silent_video):
+            os.remove(silent_video)
+
+def scale_images_for_profile(image_files, profile, workspace):
+    """
+    Downscale the stills to the profile's resolution.
+    
+    Returns (image_files, caption_scale); caption_scale is the factor applied,
+    which the caption renderers use for their pixel constants.
+    """
+    scale = get_profile_scale(get_canvas_size(image_files), profile)
+    if scale >= 1.0:
+        return image_files, 1.0
+    image_cache = get_image_cache()
+    with current_trace().stage("scale_images"):
+        if image_cache is not None:
+            # Variants of the same images at the same scale are reused from earlier renders
+            return image_cache.scale_images(image_files, scale, workspace.subdir("scaled")), scale
+        return scale_images(image_files, scale, workspace.subdir("scaled")), scale
+
+def generate_video(texts, image_urls, output_path=r"Flask\uploads\output.mp4", subtitle_style="modern", single_pass=True, workers=None, keep_workspace=None, progress=None, caption_backend=None,
+                   profile=None, segment_cache=None, trace=None, output_formats=None, hls=None, tts_mode=None):
     """
     Generate a video that narrates given texts over corresponding images with modern subtitles.
+    
+    With single_pass (the default) the captions_ai style is rendered in memory and
+    encoded once by ffmpeg, and the modern style is encoded per segment by ffmpeg
+    and stream-copy concatenated; otherwise the MoviePy multi-pass path is used.
+    
+    workers > 1 (default: VIDEO_RENDER_WORKERS, else 1) renders each chapter in
+    its own process and stitches the chunks with a stream-copy concat.
+    
+    Every intermediate file lives in a private JobWorkspace, so concurrent
+    renders never collide and nothing is left behind when a render fails.
+    keep_workspace (default: VIDEO_KEEP_WORKSPACE) keeps it for debugging.
+    
+    caption_backend picks how single-pass captions_ai captions are drawn:
+    "ass" burns an ASS script in with libass during the encode, "python"
+    composites every caption state in Python (default: VIDEO_CAPTION_BACKEND, else "ass").
+    
+    progress(stage, fraction) is called as the render advances through the
+    "acquiring", "aligning" and "rendering" stages (see video.jobs).
+    
+    profile is a render profile name from video.profiles ("draft", "standard",
+    "final"; default: VIDEO_RENDER_PROFILE, else "standard") that sets the
+    resolution, fps and x264/AAC settings; captions scale with the resolution.
+    
+    segment_cache (default: VIDEO_SEGMENT_CACHE, else disabled) renders the
+    single-pass styles chapter by chapter and keeps every encoded chapter in
+    an on-disk cache, so re-rendering a reel where only some chapters changed
+    re-encodes just those chapters and stream-copies the rest.
+    
+    trace (a video.metrics.RenderTrace) collects per-stage timings and counters
+    (frames, bytes downloaded, TTS characters, cache hits); the caller finishes
+    it. Without one, a trace is created and finished here, which writes it to
+    VIDEO_TRACE_DIR and adds it to the process-wide render metrics.
+    
+    output_formats (e.g. ["16:9", "9:16", "1:1"], see video.profiles.OUTPUT_FORMATS)
+    renders every format from the same decode in one ffmpeg run, each with
+    captions laid out for its own frame, and writes them next to output_path
+    as output_16x9.mp4, output_9x16.mp4, ...; {format: path} is returned.
+    Needs single_pass.
+    
+    hls (default: VIDEO_HLS, else off; True, a dict of video.streaming.HlsSettings
+    fields or HlsSettings) also packages the video (every format) as HLS in
+    <output>_hls/index.m3u8, renders chapter by chapter and publishes each
+    chapter's segments as soon as it is encoded, so playback can start
+    before the render ends. Needs single_pass.
+    
+    tts_mode (default: VIDEO_TTS_MODE, else "segment") "batched" synthesizes
+    the whole narration in one TTS request and splits it per segment (see
+    get_narrations_batched) instead of one request per segment.
     """
+    output_formats = get_output_formats(output_formats)
+    if output_formats and not single_pass:
+        raise ValueError("output_formats need the single-pass renderer")
+    hls = get_hls_settings(hls)
+    if hls and not single_pass:
+        raise ValueError("hls needs the single-pass renderer")
+    output_paths = {output_format: get_format_output_path(output_path, output_format) for output_format in output_formats}
+    if workers is None:
+        workers = int(os.environ.get("VIDEO_RENDER_WORKERS", "1"))
+    caption_backend = get_caption_backend(caption_backend)
+    tts_mode = get_tts_mode(tts_mode)
+    profile = get_render_profile(profile)
+    segment_cache = get_segment_cache(segment_cache)
+    owns_trace = trace is None
+    trace = trace or RenderTrace()
+    
+    try:
+        with activate(trace), JobWorkspace(keep=keep_workspace) as workspace:
+            result = render_video_in_workspace(texts, image_urls, output_path, subtitle_style, single_pass, workers, workspace,
+                                               progress, caption_backend, profile, segment_cache, output_paths, hls, tts_mode)
+        for path in output_paths.values() if output_paths else [output_path]:
+            trace.count("output_bytes", os.path.getsize(path))
+    except Exception as e:
+        if owns_trace:
+            trace.finish(error=e)
+        raise
+    if owns_trace:
+        trace.finish()
+    return output_paths or result
+
+def render_video_in_workspace(texts, image_urls, output_path, subtitle_style, single_pass, workers, workspace, progress=None,
+                              caption_backend="ass", profile=None, segment_cache=None, output_paths=None, hls=None,
+                              tts_mode="segment"):
+    """
+    Body of generate_video; all intermediate files are created inside workspace,
+    which the caller removes afterwards. With output_paths ({format: path})
+    those files are written instead of output_path; with hls (HlsSettings)
+    they are packaged for streaming as well.
+    """
+    progress = progress or (lambda stage, fraction=None: None)
+    profile = get_render_profile(profile)
+    fps = profile.fps
+    encode_options = get_encode_options(profile)
+    
     clips = []
     durations = []
-    temp_image_files = []
+    audio_files = []
     all_words_with_timestamps = []
     segment_start_times = [0.0]  # Start times of each segment
     total_duration = 0.0
     
-    # Download images from URLs
-    for url in image_urls:
-        temp_image_files.append(download_image(url))
+    if workers > 1 or (single_pass and (segment_cache is not None or hls)):
+        # Images are fetched here and the narration of the chapters not found in
+        # the segment cache up front in render_segments_parallel; Whisper and
+        # encoding run per chapter (in parallel worker processes when workers > 1)
+        if hls:
+            encode_options = dict(encode_options, keyframe_interval=hls.keyframe_interval)
+        progress("acquiring")
+        with current_trace().stage("acquire"):
+            temp_image_files, _ = acquire_assets(image_urls, output_dir=workspace.subdir("assets"))
+        temp_image_files, caption_scale = scale_images_for_profile(temp_image_files, profile, workspace)
+        render_segments_parallel(texts, temp_image_files, subtitle_style, output_path, workers, fps=fps,
+                                 work_dir=workspace.subdir("segments"), progress=progress, caption_backend=caption_backend,
+                                 encode_options=encode_options, caption_scale=caption_scale, segment_cache=segment_cache,
+                                 output_paths=output_paths, hls=hls, tts_mode=tts_mode)
+        return
     
-    for text, image_file in zip(texts, temp_image_files):
-        # Generate narration audio
-        audio_file = get_narration(text)
-        
-        # Get word-level timestamps with Whisper (more accurate)
-        segment_words = get_word_timestamps_with_whisper(audio_file, text)
-        
+    # Download images and generate narration audio concurrently
+    progress("acquiring")
+    with current_trace().stage("acquire"):
+        temp_image_files, narration_files = acquire_assets(image_urls, texts, output_dir=workspace.subdir("assets"), tts_mode=tts_mode)
+    temp_image_files, caption_scale = scale_images_for_profile(temp_image_files, profile, workspace)
+    
+    # Get word-level timestamps with Whisper (more accurate): cached clips are
+    # reused and the rest are aligned together, on the shared server if configured
+    progress("aligning")
+    words_per_segment = align_narration(narration_files, texts)
+    
+    for text, image_file, audio_file, segment_words in zip(texts, temp_image_files, narration_files, words_per_segment):
         # Adjust timestamps for the current segment
         for word in segment_words:
             word["start"] += total_duration
@@ -524,53 +1630,74 @@ def generate_video(texts, image_urls, output_path=r"Flask\uploads\output.mp4", s
         # Add to global list
         all_words_with_timestamps.extend(segment_words)
         
-        # Create video clip
-        audio_clip = AudioFileClip(audio_file)
-        duration = audio_clip.duration
+        # Read from the file header; the ffmpeg renderers read the audio files directly
+        duration = get_audio_duration(audio_file)
+        if not single_pass:
+            # Silent video clip; the narration track is built by ffmpeg and muxed in afterwards
+            clips.append(ImageClip(image_file).set_duration(duration))
         durations.append(duration)
+        audio_files.append(audio_file)
         
         # Update total duration and add new segment start time
         total_duration += duration
         segment_start_times.append(total_duration)
-        
-        image_clip = ImageClip(image_file).set_duration(duration).set_audio(audio_clip)
-        clips.append(image_clip)
-    
-    # Create video without subtitles first
-    temp_video = "temp_output_no_subs.mp4"
-    final_video = concatenate_videoclips(clips, method="compose")
-    final_video.write_videofile(temp_video, codec="libx264", fps=24, audio_codec="aac")
     
-    # Add subtitles based on style
-    if subtitle_style == "captions_ai":
-        add_dynamic_subtitles(temp_video, all_words_with_timestamps, output_path)
-    else:
-        # Create SRT subtitle file using the improved timestamps
-        srt_file = create_srt_file_from_words(all_words_with_timestamps, segment_start_times, texts)
+    progress("rendering")
+    temp_video = workspace.path("temp_output_no_subs.mp4")
+    trace = current_trace()
+    # Spans of the sub-steps (compose, captions, encode) nest inside "render"
+    with trace.stage("render"):
+        if output_paths:
+            # One decode split into every format, each captioned by libass for its own frame
+            render_slideshow_formats(temp_image_files, audio_files, segment_start_times, all_words_with_timestamps, texts,
+                                     subtitle_style, output_paths, fps=fps, work_dir=workspace.directory, progress=progress,
+                                     encode_options=encode_options, caption_scale=caption_scale)
+        elif subtitle_style == "captions_ai" and single_pass and caption_backend == "ass":
+            # ffmpeg loops the stills and libass draws the captions during the one encode
+            render_ass_captioned_video(temp_image_files, audio_files, segment_start_times, all_words_with_timestamps, output_path,
+                                       fps=fps, work_dir=workspace.directory, progress=progress,
+                                       encode_options=encode_options, caption_scale=caption_scale)
+        elif subtitle_style == "captions_ai" and single_pass:
+            # Frames go straight from memory into one ffmpeg encode with the narration
+            render_captioned_video(temp_image_files, audio_files, segment_start_times, all_words_with_timestamps, output_path,
+                                   fps=fps, progress=progress, encode_options=encode_options, caption_scale=caption_scale)
+        elif single_pass:
+            # Still images looped by ffmpeg, subtitles burned in, segments stream-copied
+            render_still_segments(temp_image_files, audio_files, durations, texts, output_path, fps=fps,
+                                  work_dir=workspace.subdir("segments"), progress=progress, encode_options=encode_options)
+        elif subtitle_style == "captions_ai":
+            # Create video without subtitles first, then add subtitles
+            with trace.stage("audio"):
+                narration = concat_audio(audio_files, workspace.path("narration.m4a"), audio_bitrate=profile.audio_bitrate)
+            write_clips(clips, temp_video, fps, profile.preset, narration)
+            with trace.stage("captions"):
+                add_dynamic_subtitles(temp_video, all_words_with_timestamps, output_path,
+                                      segment_start_times=segment_start_times, temp_dir=workspace.directory, progress=progress,
+                                      encode_options=encode_options, caption_scale=caption_scale)
+        else:
+            # Create video without subtitles first
+            with trace.stage("audio"):
+                narration = concat_audio(audio_files, workspace.path("narration.m4a"), audio_bitrate=profile.audio_bitrate)
+            write_clips(clips, temp_video, fps, profile.preset, narration)
         
-        # Use FFmpeg to add subtitles
-        subprocess.run([
-            "ffmpeg",
-            "-i", temp_video,
-            "-vf", f"subtitles={srt_file}",
-            "-c:a", "copy",
-            output_path
-        ], check=True)
+            # Create SRT subtitle file using the improved timestamps
+            srt_file = create_srt_file_from_words(all_words_with_timestamps, segment_start_times, texts,
+                                                  output_srt=workspace.path("subtitles.srt"))
         
-        os.remove(srt_file)
-    
-    # Clean up
-    if os.path.exists(temp_video):
-        os.remove(temp_video)
+            # Use FFmpeg to add subtitles
+            with trace.stage("encode"):
+                subprocess.run([
+                    "ffmpeg",
+                    "-i", temp_video,
+                    "-vf", f"subtitles='{escape_filter_path(srt_file)}'",
+                    "-c:v", "libx264", "-preset", profile.preset, "-crf", str(profile.crf),
+                    "-c:a", "copy",
+                    output_path
+                ], check=True)
     
-    for file in temp_image_files:
-        if os.path.exists(file):
-            os.remove(file)
+    trace.count("frames", int(round(total_duration * fps)))
     
-    for text in texts:
-        temp_audio_file = f"temp_{abs(hash(text))}.mp3"
-        if os.path.exists(temp_audio_file):
-            os.remove(temp_audio_file)
+    # Images, narration and temp videos are removed with the workspace
 
 def create_srt_file_from_words(words_with_timestamps, segment_start_times, original_texts, output_srt="subtitles.srt"):
     """
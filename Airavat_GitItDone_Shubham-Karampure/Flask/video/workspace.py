@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+
+
+class JobWorkspace:
+    """
+    Private scratch directory for one render job.
+
+    Every intermediate file of a render (images, narration, subtitles, temp
+    videos, segment chunks) is created inside the workspace, so concurrent
+    renders never share a path. The directory is removed when the job ends,
+    whether it succeeded or failed, unless it is kept for debugging.
+
+    Args:
+        base_dir: Parent directory (default: VIDEO_WORKSPACE_DIR or the system temp dir)
+        keep: True keeps the directory, "on_failure" keeps it only if the job
+            raised, False always removes it (default: VIDEO_KEEP_WORKSPACE)
+
+    Usage:
+        with JobWorkspace() as workspace:
+            audio_file = workspace.path("narration", "segment_000.mp3")
+    """
+
+    def __init__(self, base_dir=None, keep=None, prefix="render_"):
+        self.base_dir = base_dir or os.environ.get("VIDEO_WORKSPACE_DIR") or None
+        if keep is None:
+            keep = os.environ.get("VIDEO_KEEP_WORKSPACE", "").lower()
+            keep = "on_failure" if keep == "on_failure" else keep in ("1", "true", "yes", "always")
+        self.keep = keep
+        self.prefix = prefix
+        self.directory = None
+
+    def create(self):
+        if self.base_dir:
+            os.makedirs(self.base_dir, exist_ok=True)
+        self.directory = tempfile.mkdtemp(prefix=self.prefix, dir=self.base_dir)
+        return self
+
+    def path(self, *parts):
+        """Path inside the workspace; parent directories are created"""
+        path = os.path.join(self.directory, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def subdir(self, *parts):
+        """Directory inside the workspace, created if needed"""
+        path = os.path.join(self.directory, *parts)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def cleanup(self):
+        if self.directory and os.path.exists(self.directory):
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self.create()
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.keep is True or (self.keep == "on_failure" and exc_type is not None):
+            print(f"Keeping render workspace for debugging: {self.directory}")
+        else:
+            self.cleanup()
+        return False